@@ -7,64 +7,158 @@ import os
 import sys
 import subprocess
 import shutil
+import hashlib
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from video_common import draw_text_frame, encoder_options, load_font, media_duration, pick_encoder, scaled_icon
+
+try:
+    from PIL import Image, ImageDraw
+except ImportError:
+    Image = None  # fall back to ffmpeg drawtext
+
+SCRIPT = os.path.abspath(__file__)
+BUILD_STAMP = "/home/kim/tsn-map/.video_build"
+ICON = "/home/kim/tsn-map/src-tauri/icons/icon.png"
+ICON_140 = "/home/kim/tsn-map/.video_icon140.png"
+TTS_CACHE = os.path.expanduser("~/.cache/tsn-map/tts")
+
+# Encode the narrated video in one ffmpeg pass; False builds per-slide
+# segments in parallel and concatenates them instead
+SINGLE_PASS = True
+
+# Frame rate for held slides: every frame is identical, so only produce
+# enough of them that slide changes land within 0.2s of the narration
+STILL_FPS = 5
+
+# Text frames: (text, font size, colour, y)
+BACKGROUND = "#0d1117"
+TITLE_TEXT = [
+    ("TSN-Map", 80, "white", 570),
+    ("Network Topology Visualization", 32, "#888888", 660),
+]
+ARCH_TEXT = [
+    ("Architecture", 56, "white", 80),
+    ("Backend - Rust + Axum + libpcap", 36, "#58a6ff", 300),
+    ("Frontend - D3.js + Chart.js + SSE", 36, "#f0883e", 400),
+]
+CLOSING_TEXT = [
+    ("TSN-Map", 60, "white", 480),
+    ("Open Source by KETI", 26, "#888888", 560),
+]
+
+def render_title_bar(path, title):
+    """Draw the 70px title bar laid over a screenshot frame"""
+    img = Image.new("RGBA", (1920, 70), BACKGROUND)
+    ImageDraw.Draw(img).text((30, 18), title, font=load_font(32), fill="white")
+    img.save(path)
+
+def drawtext(lines):
+    """ffmpeg drawtext chain for the same centred text lines"""
+    return ",".join(f"drawtext=text={text}:fontsize={size}:fontcolor={color}:"
+                    f"x=(w-text_w)/2:y={y}" for text, size, color, y in lines)
+
+def venv_python_path(venv_path):
+    """Python interpreter inside the venv"""
+    if os.name == 'nt':
+        return os.path.join(venv_path, "Scripts", "python.exe")
+    python = os.path.join(venv_path, "bin", "python3")
+    if not os.path.exists(python):
+        python = os.path.join(venv_path, "bin", "python")
+    return python
+
+def file_stamp(path):
+    """Size and modification time of a file, which change whenever it is rewritten"""
+    st = os.stat(path)
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+def build_key(screenshots):
+    """Hash of everything the video is built from: this script, the icon and the screenshots"""
+    h = hashlib.sha1()
+    with open(SCRIPT, "rb") as f:
+        h.update(f.read())
+    for src in [ICON] + [f"/home/kim/tsn-map/pic/{src}" for src, _ in screenshots]:
+        if os.path.exists(src):
+            h.update(f"{src}:{file_stamp(src)}".encode())
+    return h.hexdigest()
+
+# CPUs owned by the current ffmpeg worker thread, if any
+WORKER = threading.local()
+
+def claim_cores(slots):
+    """Pool initializer: the worker thread takes one core set for good and pins itself to it"""
+    WORKER.cores = slots.get()
+    # Pid 0 is the calling thread; every ffmpeg it starts inherits the mask
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, WORKER.cores)
+
+def ffmpeg_pool():
+    """Thread pool for parallel ffmpegs, each worker pinned to its own cores"""
+    # CPU affinity is Linux-only; elsewhere the core sets only size -threads
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(os.cpu_count() or 1))
+    # A couple of cores per ffmpeg; disjoint sets stop them migrating,
+    # and the spare core of an odd count goes to the last set
+    workers = max(1, len(cores) // 2)
+    slots = queue.Queue()
+    for i in range(workers):
+        slots.put(set(cores[i * len(cores) // workers:(i + 1) * len(cores) // workers]))
+    return ThreadPoolExecutor(max_workers=workers, initializer=claim_cores, initargs=(slots,))
 
 def main():
     # Change to project directory
     os.chdir("/home/kim/tsn-map")
     print("=== TSN-Map Video Creator ===\n")
 
-    # Create isolated venv to avoid system Python issues
+    # Isolated venv to avoid system Python issues, kept between runs
     venv_path = "/home/kim/tsn-map/.video_venv"
     work_dir = "/home/kim/tsn-map/pic/video_work"
+    venv_python = venv_python_path(venv_path)
 
-    print("[1/6] Creating isolated Python environment...")
-    if os.path.exists(venv_path):
-        shutil.rmtree(venv_path)
-
-    result = subprocess.run([sys.executable, "-m", "venv", venv_path],
-                          capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"venv creation failed: {result.stderr}")
-        print("Trying with --without-pip...")
-        subprocess.run([sys.executable, "-m", "venv", "--without-pip", venv_path])
-
-    # Get venv Python path
-    if os.name == 'nt':
-        venv_python = os.path.join(venv_path, "Scripts", "python.exe")
+    gtts_ok = os.path.exists(venv_python) and subprocess.run(
+        [venv_python, "-c", "import gtts"], capture_output=True).returncode == 0
+    if gtts_ok:
+        print("[1/6] Reusing isolated Python environment...")
+        print(f"  Using: {venv_python}")
+        print("[2/6] gTTS already installed")
     else:
-        venv_python = os.path.join(venv_path, "bin", "python3")
+        print("[1/6] Creating isolated Python environment...")
+        if os.path.exists(venv_path):
+            shutil.rmtree(venv_path)
 
-    if not os.path.exists(venv_python):
-        venv_python = os.path.join(venv_path, "bin", "python")
+        result = subprocess.run([sys.executable, "-m", "venv", venv_path],
+                              capture_output=True, text=True)
+        if result.returncode != 0:
+            print(f"venv creation failed: {result.stderr}")
+            print("Trying with --without-pip...")
+            subprocess.run([sys.executable, "-m", "venv", "--without-pip", venv_path])
 
-    print(f"  Using: {venv_python}")
+        venv_python = venv_python_path(venv_path)
+        print(f"  Using: {venv_python}")
 
-    # Install pip if needed
-    print("[2/6] Installing dependencies...")
-    subprocess.run([venv_python, "-m", "ensurepip", "--upgrade"],
-                  capture_output=True)
-    subprocess.run([venv_python, "-m", "pip", "install", "--upgrade", "pip"],
-                  capture_output=True)
+        # Install pip if needed
+        print("[2/6] Installing dependencies...")
+        subprocess.run([venv_python, "-m", "ensurepip", "--upgrade"],
+                      stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        subprocess.run([venv_python, "-m", "pip", "install", "--upgrade", "pip"],
+                      stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
 
-    # Try to install gTTS
-    result = subprocess.run([venv_python, "-m", "pip", "install", "gtts"],
-                          capture_output=True, text=True)
+        # Try to install gTTS; only stderr is kept, for the error message
+        result = subprocess.run([venv_python, "-m", "pip", "install", "gtts"],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
 
-    gtts_ok = result.returncode == 0
-    if gtts_ok:
-        print("  gTTS installed successfully")
-    else:
-        print("  gTTS failed, will create silent video")
-        print(f"  Error: {result.stderr[:200] if result.stderr else 'unknown'}")
+        gtts_ok = result.returncode == 0
+        if gtts_ok:
+            print("  gTTS installed successfully")
+        else:
+            print("  gTTS failed, will create silent video")
+            print(f"  Error: {result.stderr[:200] if result.stderr else 'unknown'}")
 
-    # Setup workspace
-    print("[3/6] Setting up workspace...")
-    if os.path.exists(work_dir):
-        shutil.rmtree(work_dir)
-    os.makedirs(work_dir)
-    os.chdir(work_dir)
-
-    # Copy screenshots
     screenshots = [
         ("Screenshot from 2026-01-19 15-31-13.png", "s01.png"),
         ("Screenshot from 2026-01-19 15-16-01.png", "s02.png"),
@@ -76,11 +170,33 @@ def main():
         ("Screenshot from 2026-01-19 15-18-44.png", "s08.png"),
     ]
 
+    # Nothing to do if the last narrated video was built from the same inputs and is
+    # still the file on disk: the other video scripts write to the same path
+    key = build_key(screenshots)
+    if os.path.exists(BUILD_STAMP):
+        with open(BUILD_STAMP) as f:
+            stamp_key, stamp_output, stamp_file = (f.read().split("\n") + ["", ""])[:3]
+        if stamp_key == key and os.path.exists(stamp_output) and file_stamp(stamp_output) == stamp_file:
+            print(f"\nInputs unchanged, video is up to date: {stamp_output}")
+            return
+
+    # Setup workspace
+    print("[3/6] Setting up workspace...")
+    if os.path.exists(work_dir):
+        shutil.rmtree(work_dir)
+    os.makedirs(work_dir)
+    os.chdir(work_dir)
+
+    # Link screenshots
     for src, dst in screenshots:
         src_path = f"/home/kim/tsn-map/pic/{src}"
         if os.path.exists(src_path):
-            shutil.copy(src_path, dst)
-    print("  Screenshots copied")
+            # ffmpeg only reads them once; a link avoids copying megabytes
+            try:
+                os.symlink(src_path, dst)
+            except OSError:
+                shutil.copy(src_path, dst)
+    print("  Screenshots linked")
 
     # Generate TTS if available
     print("[4/6] Generating TTS narration...")
@@ -90,7 +206,13 @@ import sys
 sys.path.insert(0, "{venv_path}/lib/python3.12/site-packages")
 sys.path.insert(0, "{venv_path}/lib/python3.11/site-packages")
 sys.path.insert(0, "{venv_path}/lib/python3.10/site-packages")
+import hashlib
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from gtts import gTTS
+cache = "{tts_cache}"
+os.makedirs(cache, exist_ok=True)
 texts = [
     ("a00.mp3", "Welcome to TSN Map. A real-time network topology visualization tool by KETI."),
     ("a01.mp3", "Architecture: Rust backend with Axum and libpcap. D3.js frontend."),
@@ -104,13 +226,25 @@ texts = [
     ("a09.mp3", "Large scale support."),
     ("a10.mp3", "Thank you. Open source by KETI."),
 ]
-for f, t in texts:
+def synth(ft):
+    f, t = ft
+    # Narration is cached by text, so unchanged lines never hit the network
+    cached = os.path.join(cache, hashlib.sha1(t.encode()).hexdigest()[:16] + ".mp3")
+    if os.path.exists(cached):
+        shutil.copy(cached, f)
+        return f"  {{f}} (cached)"
     try:
         gTTS(text=t, lang='en').save(f)
-        print(f"  {{f}}")
+        shutil.copy(f, cached)
+        return f"  {{f}}"
     except Exception as e:
-        print(f"  {{f}} FAILED: {{e}}")
-'''.format(venv_path=venv_path)
+        return f"  {{f}} FAILED: {{e}}"
+
+# Each request is a network round-trip, so run them all at once
+with ThreadPoolExecutor(max_workers=len(texts)) as ex:
+    for line in ex.map(synth, texts):
+        print(line)
+'''.format(venv_path=venv_path, tts_cache=TTS_CACHE)
 
         result = subprocess.run([venv_python, "-c", tts_script],
                               capture_output=True, text=True)
@@ -118,92 +252,196 @@ for f, t in texts:
         if result.stderr:
             print(f"  Warnings: {result.stderr[:200]}")
 
-        has_audio = os.path.exists("a00.mp3")
+        # A line that failed to synthesize leaves its file missing
+        has_audio = all(os.path.exists(f"a{i:02d}.mp3") for i in range(11))
     else:
         has_audio = False
         print("  Skipping TTS (not available)")
 
     # Create video frames
     print("[5/6] Creating video frames...")
-    icon = "/home/kim/tsn-map/src-tauri/icons/icon.png"
-
-    def ffmpeg(cmd):
-        subprocess.run(f"ffmpeg -y {cmd} 2>/dev/null", shell=True)
-
-    # Title frame
-    ffmpeg(f'-f lavfi -i "color=c=#0d1117:s=1920x1080:d=1" -i "{icon}" '
-           f'-filter_complex "[1:v]scale=140:140[l];[0:v][l]overlay=890:340[b];'
-           f'[b]drawtext=text=TSN-Map:fontsize=80:fontcolor=white:x=(w-text_w)/2:y=570,'
-           f'drawtext=text=Network Topology Visualization:fontsize=32:fontcolor=#888888:x=(w-text_w)/2:y=660" '
-           f'-frames:v 1 f00.png')
-    print("  Title")
-
-    # Architecture frame
-    ffmpeg('-f lavfi -i "color=c=#0d1117:s=1920x1080:d=1" '
-           '-vf "drawtext=text=Architecture:fontsize=56:fontcolor=white:x=(w-text_w)/2:y=80,'
-           'drawtext=text=Backend - Rust + Axum + libpcap:fontsize=36:fontcolor=#58a6ff:x=(w-text_w)/2:y=300,'
-           'drawtext=text=Frontend - D3.js + Chart.js + SSE:fontsize=36:fontcolor=#f0883e:x=(w-text_w)/2:y=400" '
-           '-frames:v 1 f01.png')
-    print("  Architecture")
-
-    # Screenshot frames
+    # Title logo pre-scaled to 140x140; the title frame goes without one if icon.png is missing
+    icon = scaled_icon(ICON, 140, ICON_140) if os.path.exists(ICON) else None
+
+    def ffmpeg(args):
+        # Run from a pool worker, ffmpeg starts on that worker's cores
+        subprocess.run(["ffmpeg", "-y", *args], stderr=subprocess.DEVNULL)
+
+    background = ["-f", "lavfi", "-i", "color=c=#0d1117:s=1920x1080:d=1"]
+
+    # Frames are independent single-image renders: run them side by side
     titles = ["", "Interface", "Topology", "Filtering", "Statistics",
               "Hosts", "Details", "Tester", "Scale"]
-    for i in range(1, 9):
-        ffmpeg(f'-i s0{i}.png -vf "scale=1920:1080:force_original_aspect_ratio=decrease,'
-               f'pad=1920:1080:(ow-iw)/2:(oh-ih)/2:#0d1117,'
-               f'drawbox=y=0:w=iw:h=70:color=#0d1117:t=fill,'
-               f'drawtext=text={titles[i]}:fontsize=32:fontcolor=white:x=30:y=18" '
-               f'-frames:v 1 f0{i+1}.png')
-    print("  Screenshot frames")
-
-    # Closing frame
-    ffmpeg('-f lavfi -i "color=c=#0d1117:s=1920x1080:d=1" '
-           '-vf "drawtext=text=TSN-Map:fontsize=60:fontcolor=white:x=(w-text_w)/2:y=480,'
-           'drawtext=text=Open Source by KETI:fontsize=26:fontcolor=#888888:x=(w-text_w)/2:y=560" '
-           '-frames:v 1 f10.png')
-    print("  Closing")
+
+    def screenshot_frames(title_bar, bar_inputs):
+        """One ffmpeg with a filter chain and output per screenshot, each under title_bar(i)"""
+        inputs = [arg for i in range(1, 9) for arg in ("-i", f"s0{i}.png")] + bar_inputs
+        graph = ";".join(f"[{i - 1}:v]scale=1920:1080:force_original_aspect_ratio=decrease,"
+                         f"pad=1920:1080:(ow-iw)/2:(oh-ih)/2:#0d1117[p{i}];"
+                         f"[p{i}]{title_bar(i)}[o{i}]"
+                         for i in range(1, 9))
+        outputs = [arg for i in range(1, 9)
+                   for arg in ("-map", f"[o{i}]", "-frames:v", "1", f"f0{i+1}.png")]
+        return [*inputs, "-filter_complex", graph, *outputs]
+
+    with ffmpeg_pool() as pool:
+        if Image:
+            # Each screenshot gets a pre-drawn title bar overlaid instead of drawbox + drawtext
+            for i in range(1, 9):
+                render_title_bar(f"bar{i}.png", titles[i])
+
+            def title_bar(i):
+                return f"[{i + 7}:v]overlay=0:0"
+
+            # Screenshot frames - started first, so ffmpeg works while the text frames are drawn
+            pool.submit(ffmpeg, screenshot_frames(
+                title_bar, [arg for i in range(1, 9) for arg in ("-i", f"bar{i}.png")]))
+
+            # Text frames drawn in-process
+            logo = icon and Image.open(icon).convert("RGBA")
+            text_frames = {0: draw_text_frame(TITLE_TEXT, logo and (logo, 340)),
+                           1: draw_text_frame(ARCH_TEXT),
+                           10: draw_text_frame(CLOSING_TEXT)}
+            # The single pass is fed these over pipes; the other paths read files
+            if not (has_audio and SINGLE_PASS):
+                for i, img in text_frames.items():
+                    img.save(f"f{i:02d}.png")
+        else:
+            def title_bar(i):
+                return (f"drawbox=y=0:w=iw:h=70:color=#0d1117:t=fill,"
+                        f"drawtext=text={titles[i]}:fontsize=32:fontcolor=white:x=30:y=18")
+
+            # Screenshot frames
+            pool.submit(ffmpeg, screenshot_frames(title_bar, []))
+
+            # Title frame
+            if icon:
+                pool.submit(ffmpeg, [*background, "-i", icon, "-filter_complex",
+                                     "[0:v][1:v]overlay=890:340[b];"
+                                     f"[b]{drawtext(TITLE_TEXT)}",
+                                     "-frames:v", "1", "f00.png"])
+            else:
+                pool.submit(ffmpeg, [*background, "-vf", drawtext(TITLE_TEXT),
+                                     "-frames:v", "1", "f00.png"])
+
+            # Architecture frame
+            pool.submit(ffmpeg, [*background, "-vf", drawtext(ARCH_TEXT),
+                                 "-frames:v", "1", "f01.png"])
+
+            # Closing frame
+            pool.submit(ffmpeg, [*background, "-vf", drawtext(CLOSING_TEXT),
+                                 "-frames:v", "1", "f10.png"])
+            text_frames = {}
+    print("  Frames done")
 
     # Create video
     print("[6/6] Creating final video...")
+    # A keyframe every second keeps the video seekable
+    encoder, (hwdev, vfilter, vcodec) = pick_encoder(gop=STILL_FPS)
+    print(f"  Encoder: {encoder}")
 
-    if has_audio:
-        # With audio - create segments and concat
-        for i in range(11):
+    if has_audio and SINGLE_PASS:
+        # With audio - single encode: each frame is held for its narration
+        # and the frame/audio pairs are joined by the concat filter
+        durations = [media_duration(f"a{i:02d}.mp3") for i in range(11)]
+        output = "/home/kim/tsn-map/tsn-map-demo-full.mp4"
+
+        def single_pass(hwdev, vfilter, vcodec):
+            """Encode the narrated video in one ffmpeg run; True if it succeeded"""
+            # Frames drawn in memory go straight to ffmpeg over pipes
+            pipes = {i: os.pipe() for i in text_frames}
+            inputs = []
+            for i, dur in enumerate(durations):
+                if i in pipes:
+                    inputs += ["-f", "image2pipe", "-framerate", str(STILL_FPS),
+                               "-i", f"pipe:{pipes[i][0]}"]
+                else:
+                    inputs += ["-loop", "1", "-framerate", str(STILL_FPS),
+                               "-t", f"{dur:.3f}", "-i", f"f{i:02d}.png"]
+            inputs += [arg for i in range(11) for arg in ("-i", f"a{i:02d}.mp3")]
+            # A piped image is one frame long: clone it for the rest of its narration
+            held = "".join(f"[{i}:v]tpad=stop_mode=clone:"
+                           f"stop_duration={max(0, durations[i] - 1 / STILL_FPS):.3f}[h{i}];"
+                           for i in pipes)
+            pairs = "".join((f"[h{i}]" if i in pipes else f"[{i}:v]") + f"[{i + 11}:a]"
+                            for i in range(11))
+            proc = subprocess.Popen(["ffmpeg", "-y", *hwdev, *inputs, "-filter_complex",
+                                     f"{held}{pairs}concat=n=11:v=1:a=1[vc][a];[vc]{vfilter}[v]",
+                                     "-map", "[v]", "-map", "[a]", *vcodec, "-r", str(STILL_FPS),
+                                     "-c:a", "aac", output],
+                                    stderr=subprocess.DEVNULL,
+                                    pass_fds=[r for r, _ in pipes.values()])
+
+            def feed(i):
+                r, w = pipes[i]
+                os.close(r)
+                try:
+                    with os.fdopen(w, "wb") as f:
+                        text_frames[i].save(f, format="PNG")
+                except BrokenPipeError:
+                    pass  # ffmpeg exited early
+
+            # ffmpeg opens its inputs in turn, so every pipe needs its own writer
+            with ThreadPoolExecutor(max_workers=max(1, len(pipes))) as pool:
+                list(pool.map(feed, pipes))
+            if proc.wait() == 0:
+                return True
+            # Don't let a half-written file pass for the video
+            if os.path.exists(output):
+                os.remove(output)
+            return False
+
+        if not single_pass(hwdev, vfilter, vcodec) and encoder != "libx264":
+            print(f"  {encoder} encode failed, retrying with libx264")
+            single_pass(*encoder_options("libx264", gop=STILL_FPS))
+    elif has_audio:
+        # With audio - create segments in parallel and concat
+        # Slice threads suit a looped still better than frame threads
+        x264 = ["-x264opts", "sliced-threads=1"] if encoder == "libx264" else []
+
+        def segment(i):
             idx = f"{i:02d}"
-            ffmpeg(f'-loop 1 -i f{idx}.png -i a{idx}.mp3 '
-                   f'-c:v libx264 -tune stillimage -c:a aac -shortest -pix_fmt yuv420p v{idx}.mp4')
+            # gTTS already delivers MP3, which MP4 carries as-is: no AAC encode
+            ffmpeg([*hwdev, "-loop", "1", "-framerate", str(STILL_FPS), "-i", f"f{idx}.png",
+                    "-i", f"a{idx}.mp3", "-vf", vfilter, *vcodec, "-r", str(STILL_FPS),
+                    "-threads", str(len(WORKER.cores)), *x264,
+                    "-c:a", "copy", "-shortest", "-movflags", "+faststart", f"v{idx}.mp4"])
+            return idx
+
+        with ffmpeg_pool() as pool:
+            for done in as_completed([pool.submit(segment, i) for i in range(11)]):
+                print(f"  Segment v{done.result()}.mp4")
 
-        with open("concat.txt", "w") as f:
-            for i in range(11):
-                f.write(f"file 'v{i:02d}.mp4'\n")
+        Path("concat.txt").write_text("".join(f"file 'v{i:02d}.mp4'\n" for i in range(11)))
 
-        ffmpeg('-f concat -safe 0 -i concat.txt -c:v libx264 -crf 20 -c:a aac '
-               '/home/kim/tsn-map/tsn-map-demo-full.mp4')
+        # Segments share identical codec parameters, so the join is a remux
         output = "/home/kim/tsn-map/tsn-map-demo-full.mp4"
+        ffmpeg(["-f", "concat", "-safe", "0", "-i", "concat.txt",
+                "-c", "copy", "-movflags", "+faststart", output])
     else:
         # Silent video
-        ffmpeg('-loop 1 -t 4 -i f00.png -loop 1 -t 5 -i f01.png '
-               '-loop 1 -t 4 -i f02.png -loop 1 -t 4 -i f03.png '
-               '-loop 1 -t 4 -i f04.png -loop 1 -t 4 -i f05.png '
-               '-loop 1 -t 4 -i f06.png -loop 1 -t 4 -i f07.png '
-               '-loop 1 -t 4 -i f08.png -loop 1 -t 4 -i f09.png '
-               '-loop 1 -t 4 -i f10.png '
-               '-filter_complex "[0][1][2][3][4][5][6][7][8][9][10]concat=n=11:v=1:a=0[out]" '
-               '-map "[out]" -c:v libx264 -pix_fmt yuv420p '
-               '/home/kim/tsn-map/tsn-map-demo-silent.mp4')
+        durations = [4, 5, 4, 4, 4, 4, 4, 4, 4, 4, 4]
+        inputs = [arg for i, dur in enumerate(durations)
+                  for arg in ("-loop", "1", "-framerate", str(STILL_FPS),
+                              "-t", str(dur), "-i", f"f{i:02d}.png")]
         output = "/home/kim/tsn-map/tsn-map-demo-silent.mp4"
+        ffmpeg([*hwdev, *inputs,
+                "-filter_complex", f"[0][1][2][3][4][5][6][7][8][9][10]concat=n=11:v=1:a=0,{vfilter}[out]",
+                "-map", "[out]", *vcodec, "-r", str(STILL_FPS), output])
 
     # Cleanup
     os.chdir("/home/kim/tsn-map")
     shutil.rmtree(work_dir)
-    shutil.rmtree(venv_path)
 
     print("\n" + "=" * 40)
     if os.path.exists(output):
         size = os.path.getsize(output) / (1024 * 1024)
         print(f"SUCCESS! Video: {output}")
         print(f"Size: {size:.1f} MB")
+        # Only a narrated build is final; a silent one is retried on the next run
+        if has_audio:
+            with open(BUILD_STAMP, "w") as f:
+                f.write(f"{key}\n{output}\n{file_stamp(output)}\n")
     else:
         print("ERROR: Video creation failed")
     print("=" * 40)
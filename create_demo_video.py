@@ -4,36 +4,45 @@ TSN-Map Demo Video Creator
 Creates a professional demo video with TTS narration
 """
 
+import importlib.util
 import os
 import subprocess
 import sys
 
 # Check and install required packages
 def install_packages():
-    try:
-        import gtts
-    except ImportError:
-        print("Installing gTTS...")
-        subprocess.run([sys.executable, "-m", "pip", "install", "--break-system-packages", "gtts"], check=True)
-
-    try:
-        from pydub import AudioSegment
-    except ImportError:
-        print("Installing pydub...")
-        subprocess.run([sys.executable, "-m", "pip", "install", "--break-system-packages", "pydub"], check=True)
+    # Import name -> pip name; probed without importing them
+    packages = {"gtts": "gtts", "mutagen": "mutagen", "PIL": "Pillow"}
+    missing = [pip for module, pip in packages.items() if importlib.util.find_spec(module) is None]
+    if missing:
+        print(f"Installing {', '.join(missing)}...")
+        subprocess.run([sys.executable, "-m", "pip", "install", "--break-system-packages", *missing], check=True)
 
 install_packages()
 
 from gtts import gTTS
-from pydub import AudioSegment
+from mutagen.mp3 import MP3
+from PIL import Image, ImageColor, ImageDraw
+import hashlib
+import json
 import shutil
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from video_common import load_font, pick_encoder, scaled_icon
 
 # Configuration
 PROJECT_DIR = "/home/kim/tsn-map"
 PIC_DIR = f"{PROJECT_DIR}/pic"
 WORK_DIR = f"{PIC_DIR}/video_work"
 OUTPUT_VIDEO = f"{PROJECT_DIR}/tsn-map-demo-full.mp4"
+TTS_CACHE = f"{PROJECT_DIR}/.tts_cache"
+STAMPS_FILE = f"{WORK_DIR}/stamps.json"
+ICON = f"{PROJECT_DIR}/src-tauri/icons/icon.png"
+
+# Local neural TTS, used instead of gTTS when both the binary and voice are present
+PIPER_MODEL = f"{PROJECT_DIR}/en_US-lessac-medium.onnx"
+USE_PIPER = bool(shutil.which("piper")) and os.path.exists(PIPER_MODEL)
 
 WIDTH = 1920
 HEIGHT = 1080
@@ -157,273 +166,342 @@ SLIDES = [
     }
 ]
 
+# Clips are encoded side by side, so split the cores between them
+CLIP_WORKERS = min(os.cpu_count() or 1, len(SLIDES))
+CLIP_THREADS = max(1, (os.cpu_count() or 1) // CLIP_WORKERS)
+
+def ffmpeg(*args):
+    """Run ffmpeg quietly, raising if it fails"""
+    subprocess.run(["ffmpeg", "-y", *args], check=True,
+                   stdin=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+# Output path -> [stamp of the inputs it was last built from, its size, its mtime]
+STAMPS = {}
+
 def create_work_dir():
-    """Create working directory"""
-    if os.path.exists(WORK_DIR):
+    """Create working directory, keeping earlier outputs unless --clean is given"""
+    if "--clean" in sys.argv and os.path.exists(WORK_DIR):
         shutil.rmtree(WORK_DIR)
-    os.makedirs(WORK_DIR)
-    print(f"Created working directory: {WORK_DIR}")
-
-def generate_tts(text, output_file):
-    """Generate TTS audio using gTTS"""
-    tts = gTTS(text=text, lang='en', slow=False)
-    tts.save(output_file)
+    os.makedirs(WORK_DIR, exist_ok=True)
+    if os.path.exists(STAMPS_FILE):
+        with open(STAMPS_FILE) as f:
+            STAMPS.update(json.load(f))
+    print(f"Working directory: {WORK_DIR}")
+
+def save_stamps():
+    """Record what the current outputs were built from"""
+    with open(STAMPS_FILE, 'w') as f:
+        json.dump(STAMPS, f, indent=1, sort_keys=True)
+
+def stamp(data):
+    """Hash of JSON-serialisable build inputs"""
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+def slide_stamp(idx, slide):
+    """Stamp of a slide's definition and narration, the code that draws it and any image it shows"""
+    if "image" in slide:
+        image = f"{PIC_DIR}/{slide['image']}"
+    else:
+        image = ICON if slide["type"] in ("title", "closing") else None
+    return stamp([slide, STAMPS.get(f"{WORK_DIR}/audio_{idx:02d}.mp3"), os.path.getmtime(__file__),
+                  image and os.path.exists(image) and os.path.getmtime(image)])
+
+def record_stamp(output, key):
+    """Remember that output, as it now is on disk, was built from key"""
+    st = os.stat(output)
+    STAMPS[output] = [key, st.st_size, st.st_mtime_ns]
+
+def up_to_date(output, key):
+    """True if output was built from the same inputs last time and has not been replaced since"""
+    # Size and mtime catch another script writing the same path, as the other video scripts do
+    if not os.path.exists(output):
+        return False
+    st = os.stat(output)
+    return STAMPS.get(output) == [key, st.st_size, st.st_mtime_ns]
+
+def synthesize(text, output_file, lang):
+    """Speak text into an MP3 with Piper if available, otherwise gTTS"""
+    if not USE_PIPER:
+        tts = gTTS(text=text, lang=lang, slow=False)
+        tts.save(output_file)
+        return
+
+    # Piper writes WAV; encode it like gTTS output (24 kHz mono MP3) for the rest of the pipeline
+    wav = output_file[:-4] + ".wav"
+    subprocess.run(["piper", "--model", PIPER_MODEL, "--output_file", wav],
+                   input=text, text=True, capture_output=True, check=True)
+    ffmpeg("-i", wav, "-ar", "24000", "-ac", "1", "-c:a", "libmp3lame", output_file)
+    os.remove(wav)
+
+def generate_tts(text, output_file, lang='en'):
+    """Generate TTS audio, reusing earlier output for the same text and voice"""
+    voice = os.path.basename(PIPER_MODEL) if USE_PIPER else lang
+    cached = f"{TTS_CACHE}/{hashlib.sha256((text + voice).encode()).hexdigest()}.mp3"
+    if os.path.exists(cached):
+        shutil.copy(cached, output_file)
+        print(f"Cached TTS: {output_file}")
+        return
+
+    synthesize(text, output_file, lang)
+    os.makedirs(TTS_CACHE, exist_ok=True)
+    shutil.copy(output_file, cached)
     print(f"Generated TTS: {output_file}")
 
 def get_audio_duration(audio_file):
     """Get duration of audio file in seconds"""
-    audio = AudioSegment.from_mp3(audio_file)
-    return len(audio) / 1000.0
-
-def create_title_slide(idx, slide):
-    """Create title slide with logo"""
-    output = f"{WORK_DIR}/frame_{idx:02d}.png"
-    icon = f"{PROJECT_DIR}/src-tauri/icons/icon.png"
-
-    cmd = f'''ffmpeg -y -f lavfi -i "color=c=#0d1117:s={WIDTH}x{HEIGHT}:d=1" \
-        -i "{icon}" \
-        -filter_complex " \
-            [1:v]scale=180:180[logo]; \
-            [0:v][logo]overlay=(W-w)/2:(H-h)/2-180[bg]; \
-            [bg]drawtext=text='{slide["title"]}':fontsize=80:fontcolor=white:x=(w-text_w)/2:y=(h/2)+50, \
-            drawtext=text='{slide["subtitle"]}':fontsize=40:fontcolor=#8b949e:x=(w-text_w)/2:y=(h/2)+140, \
-            drawtext=text='{slide["text3"]}':fontsize=32:fontcolor=#58a6ff:x=(w-text_w)/2:y=(h/2)+200, \
-            drawtext=text='{slide["text4"]}':fontsize=28:fontcolor=#6e7681:x=(w-text_w)/2:y=h-80" \
-        -frames:v 1 "{output}" 2>/dev/null'''
-    subprocess.run(cmd, shell=True, check=True)
-    print(f"Created title slide: {output}")
-
-def create_architecture_slide(idx, slide):
-    """Create architecture diagram slide"""
-    output = f"{WORK_DIR}/frame_{idx:02d}.png"
-
-    cmd = f'''ffmpeg -y -f lavfi -i "color=c=#0d1117:s={WIDTH}x{HEIGHT}:d=1" \
-        -vf " \
-            drawtext=text='System Architecture':fontsize=60:fontcolor=white:x=(w-text_w)/2:y=40, \
-            drawbox=x=100:y=120:w=800:h=280:color=#161b22:t=fill, \
-            drawtext=text='Backend (Rust)':fontsize=32:fontcolor=#58a6ff:x=120:y=140, \
-            drawtext=text='• Axum Web Framework':fontsize=24:fontcolor=#c9d1d9:x=140:y=190, \
-            drawtext=text='• libpcap Packet Capture':fontsize=24:fontcolor=#c9d1d9:x=140:y=225, \
-            drawtext=text='• Real-time SSE Streaming':fontsize=24:fontcolor=#c9d1d9:x=140:y=260, \
-            drawtext=text='• Topology Graph Builder':fontsize=24:fontcolor=#c9d1d9:x=140:y=295, \
-            drawtext=text='• Protocol Parsers':fontsize=24:fontcolor=#c9d1d9:x=140:y=330, \
-            drawbox=x=1020:y=120:w=800:h=280:color=#161b22:t=fill, \
-            drawtext=text='Frontend (Web)':fontsize=32:fontcolor=#f0883e:x=1040:y=140, \
-            drawtext=text='• D3.js Force Graph':fontsize=24:fontcolor=#c9d1d9:x=1060:y=190, \
-            drawtext=text='• Chart.js Statistics':fontsize=24:fontcolor=#c9d1d9:x=1060:y=225, \
-            drawtext=text='• EventSource (SSE)':fontsize=24:fontcolor=#c9d1d9:x=1060:y=260, \
-            drawtext=text='• Responsive UI':fontsize=24:fontcolor=#c9d1d9:x=1060:y=295, \
-            drawtext=text='• Dark Theme':fontsize=24:fontcolor=#c9d1d9:x=1060:y=330, \
-            drawtext=text='───────────────────────────────▶':fontsize=36:fontcolor=#7ee787:x=920:y=240, \
-            drawbox=x=100:y=450:w=1720:h=200:color=#161b22:t=fill, \
-            drawtext=text='Supported Protocols':fontsize=32:fontcolor=#7ee787:x=120:y=470, \
-            drawtext=text='Ethernet • IPv4 • IPv6 • TCP • UDP • ARP • ICMP • LLDP • VLAN (802.1Q) • PTP (1588)':fontsize=26:fontcolor=#c9d1d9:x=120:y=520, \
-            drawtext=text='MVRP • MRP • CDP • STP • LACP • HomePlug • IGMP • DNS • HTTP • TLS':fontsize=26:fontcolor=#c9d1d9:x=120:y=560, \
-            drawbox=x=100:y=700:w=1720:h=120:color=#161b22:t=fill, \
-            drawtext=text='Data Flow':fontsize=32:fontcolor=#58a6ff:x=120:y=720, \
-            drawtext=text='Network Interface → Packet Capture → Protocol Parsing → Topology Building → SSE Stream → Web UI':fontsize=24:fontcolor=#c9d1d9:x=120:y=770" \
-        -frames:v 1 "{output}" 2>/dev/null'''
-    subprocess.run(cmd, shell=True, check=True)
-    print(f"Created architecture slide: {output}")
-
-def create_code_slide1(idx, slide):
-    """Create code slide for packet capture"""
-    output = f"{WORK_DIR}/frame_{idx:02d}.png"
-
-    # Escape special characters for ffmpeg
-    cmd = f'''ffmpeg -y -f lavfi -i "color=c=#0d1117:s={WIDTH}x{HEIGHT}:d=1" \
-        -vf " \
-            drawtext=text='Packet Capture - src/capture/mod.rs':fontsize=48:fontcolor=white:x=100:y=40, \
-            drawbox=x=80:y=100:w=1760:h=520:color=#161b22:t=fill, \
-            drawtext=text='pub async fn start_capture(iface\\: String) -> Result<()> {{':fontsize=24:fontcolor=#ff7b72:fontfamily=monospace:x=100:y=130, \
-            drawtext=text='    let mut cap = Capture\\:\\:from_device(iface.as_str())?':fontsize=24:fontcolor=#c9d1d9:fontfamily=monospace:x=100:y=170, \
-            drawtext=text='        .promisc(true)      // Capture all packets':fontsize=24:fontcolor=#8b949e:fontfamily=monospace:x=100:y=210, \
-            drawtext=text='        .snaplen(65535)     // Full packet capture':fontsize=24:fontcolor=#8b949e:fontfamily=monospace:x=100:y=250, \
-            drawtext=text='        .timeout(1000)      // 1 second timeout':fontsize=24:fontcolor=#8b949e:fontfamily=monospace:x=100:y=290, \
-            drawtext=text='        .open()?;':fontsize=24:fontcolor=#c9d1d9:fontfamily=monospace:x=100:y=330, \
-            drawtext=text='':fontsize=24:fontcolor=#c9d1d9:fontfamily=monospace:x=100:y=370, \
-            drawtext=text='    while let Ok(packet) = cap.next_packet() {{':fontsize=24:fontcolor=#ff7b72:fontfamily=monospace:x=100:y=410, \
-            drawtext=text='        let info = parse_packet(packet.data);':fontsize=24:fontcolor=#c9d1d9:fontfamily=monospace:x=100:y=450, \
-            drawtext=text='        topology_tx.send(info).await?;  // Send to SSE':fontsize=24:fontcolor=#79c0ff:fontfamily=monospace:x=100:y=490, \
-            drawtext=text='    }}':fontsize=24:fontcolor=#c9d1d9:fontfamily=monospace:x=100:y=530, \
-            drawtext=text='}}':fontsize=24:fontcolor=#c9d1d9:fontfamily=monospace:x=100:y=570, \
-            drawbox=x=80:y=650:w=1760:h=150:color=#238636@0.3:t=fill, \
-            drawtext=text='Key Features':fontsize=32:fontcolor=#7ee787:x=100:y=670, \
-            drawtext=text='• Uses libpcap for cross-platform packet capture':fontsize=26:fontcolor=#c9d1d9:x=100:y=720, \
-            drawtext=text='• Async streaming to web clients via SSE':fontsize=26:fontcolor=#c9d1d9:x=100:y=760" \
-        -frames:v 1 "{output}" 2>/dev/null'''
-    subprocess.run(cmd, shell=True, check=True)
-    print(f"Created code slide 1: {output}")
-
-def create_code_slide2(idx, slide):
-    """Create code slide for protocol parsing"""
-    output = f"{WORK_DIR}/frame_{idx:02d}.png"
-
-    cmd = f'''ffmpeg -y -f lavfi -i "color=c=#0d1117:s={WIDTH}x{HEIGHT}:d=1" \
-        -vf " \
-            drawtext=text='Protocol Parsing - src/capture/packet.rs':fontsize=48:fontcolor=white:x=100:y=40, \
-            drawbox=x=80:y=100:w=1760:h=480:color=#161b22:t=fill, \
-            drawtext=text='fn get_protocol_name(ethertype\\: u16) -> String {{':fontsize=24:fontcolor=#ff7b72:fontfamily=monospace:x=100:y=130, \
-            drawtext=text='    match ethertype {{':fontsize=24:fontcolor=#ff7b72:fontfamily=monospace:x=100:y=170, \
-            drawtext=text='        0x0800 => \"IPv4\".to_string(),':fontsize=24:fontcolor=#a5d6ff:fontfamily=monospace:x=100:y=210, \
-            drawtext=text='        0x0806 => \"ARP\".to_string(),':fontsize=24:fontcolor=#a5d6ff:fontfamily=monospace:x=100:y=250, \
-            drawtext=text='        0x86DD => \"IPv6\".to_string(),':fontsize=24:fontcolor=#a5d6ff:fontfamily=monospace:x=100:y=290, \
-            drawtext=text='        0x8100 => \"VLAN\".to_string(),   // 802.1Q':fontsize=24:fontcolor=#7ee787:fontfamily=monospace:x=100:y=330, \
-            drawtext=text='        0x88CC => \"LLDP\".to_string(),   // 802.1AB':fontsize=24:fontcolor=#7ee787:fontfamily=monospace:x=100:y=370, \
-            drawtext=text='        0x88F7 => \"PTP\".to_string(),    // IEEE 1588':fontsize=24:fontcolor=#7ee787:fontfamily=monospace:x=100:y=410, \
-            drawtext=text='        _ => format!(\"0x{{:04X}}\", ethertype)':fontsize=24:fontcolor=#a5d6ff:fontfamily=monospace:x=100:y=450, \
-            drawtext=text='    }}':fontsize=24:fontcolor=#c9d1d9:fontfamily=monospace:x=100:y=490, \
-            drawtext=text='}}':fontsize=24:fontcolor=#c9d1d9:fontfamily=monospace:x=100:y=530, \
-            drawbox=x=80:y=620:w=850:h=180:color=#161b22:t=fill, \
-            drawtext=text='Standard Protocols':fontsize=28:fontcolor=#58a6ff:x=100:y=640, \
-            drawtext=text='IPv4, IPv6, TCP, UDP':fontsize=22:fontcolor=#c9d1d9:x=100:y=680, \
-            drawtext=text='ARP, ICMP, DNS, HTTP':fontsize=22:fontcolor=#c9d1d9:x=100:y=710, \
-            drawtext=text='IGMP, STP, LACP':fontsize=22:fontcolor=#c9d1d9:x=100:y=740, \
-            drawbox=x=990:y=620:w=850:h=180:color=#161b22:t=fill, \
-            drawtext=text='TSN Protocols':fontsize=28:fontcolor=#f0883e:x=1010:y=640, \
-            drawtext=text='VLAN (802.1Q)':fontsize=22:fontcolor=#c9d1d9:x=1010:y=680, \
-            drawtext=text='LLDP (802.1AB)':fontsize=22:fontcolor=#c9d1d9:x=1010:y=710, \
-            drawtext=text='PTP (IEEE 1588)':fontsize=22:fontcolor=#c9d1d9:x=1010:y=740" \
-        -frames:v 1 "{output}" 2>/dev/null'''
-    subprocess.run(cmd, shell=True, check=True)
-    print(f"Created code slide 2: {output}")
-
-def create_screenshot_slide(idx, slide):
-    """Create slide from screenshot with overlay"""
-    output = f"{WORK_DIR}/frame_{idx:02d}.png"
+    # Read from the MP3 headers; no need to decode the audio
+    return MP3(audio_file).info.length
+
+def create_title_slide(slide, base=0, tag=""):
+    """Inputs and filtergraph for the title slide with logo"""
+    inputs = [["-f", "lavfi", "-i", f"color=c=#0d1117:s={WIDTH}x{HEIGHT}"], ["-i", scaled_icon(ICON, 180, f"{WORK_DIR}/icon_180.png")]]
+    graph = f'''\
+        [{base}:v][{base + 1}:v]overlay=(W-w)/2:(H-h)/2-180[bg{tag}]; \
+        [bg{tag}]drawtext=text='{slide["title"]}':fontsize=80:fontcolor=white:x=(w-text_w)/2:y=(h/2)+50, \
+        drawtext=text='{slide["subtitle"]}':fontsize=40:fontcolor=#8b949e:x=(w-text_w)/2:y=(h/2)+140, \
+        drawtext=text='{slide["text3"]}':fontsize=32:fontcolor=#58a6ff:x=(w-text_w)/2:y=(h/2)+200, \
+        drawtext=text='{slide["text4"]}':fontsize=28:fontcolor=#6e7681:x=(w-text_w)/2:y=h-80'''
+    return inputs, graph
+
+# Slide items: ("box", x, y, w, h, colour) or ("text"/"code", text, size, colour, x, y);
+# x may be "center", and box colours take an optional @alpha like ffmpeg's
+def draw_slide(name, items):
+    """Draw a static slide with Pillow and return its PNG path"""
+    img = Image.new("RGB", (WIDTH, HEIGHT), "#0d1117")
+    draw = ImageDraw.Draw(img, "RGBA")
+    for kind, *item in items:
+        if kind == "box":
+            x, y, w, h, color = item
+            color, _, alpha = color.partition("@")
+            fill = ImageColor.getrgb(color) + (round(float(alpha or 1) * 255),)
+            draw.rectangle([x, y, x + w - 1, y + h - 1], fill=fill)
+        else:
+            text, size, color, x, y = item
+            font = load_font(size, kind == "code")
+            if x == "center":
+                x = (WIDTH - draw.textlength(text, font=font)) / 2
+            draw.text((x, y), text, font=font, fill=color)
+
+    output = f"{WORK_DIR}/frame_{name}.png"
+    img.save(output)
+    return output
+
+def create_architecture_slide(slide, base=0, tag=""):
+    """Inputs and filtergraph for the architecture diagram slide"""
+    frame = draw_slide("architecture", [
+        ("text", "System Architecture", 60, "white", "center", 40),
+        ("box", 100, 120, 800, 280, "#161b22"),
+        ("text", "Backend (Rust)", 32, "#58a6ff", 120, 140),
+        ("text", "• Axum Web Framework", 24, "#c9d1d9", 140, 190),
+        ("text", "• libpcap Packet Capture", 24, "#c9d1d9", 140, 225),
+        ("text", "• Real-time SSE Streaming", 24, "#c9d1d9", 140, 260),
+        ("text", "• Topology Graph Builder", 24, "#c9d1d9", 140, 295),
+        ("text", "• Protocol Parsers", 24, "#c9d1d9", 140, 330),
+        ("box", 1020, 120, 800, 280, "#161b22"),
+        ("text", "Frontend (Web)", 32, "#f0883e", 1040, 140),
+        ("text", "• D3.js Force Graph", 24, "#c9d1d9", 1060, 190),
+        ("text", "• Chart.js Statistics", 24, "#c9d1d9", 1060, 225),
+        ("text", "• EventSource (SSE)", 24, "#c9d1d9", 1060, 260),
+        ("text", "• Responsive UI", 24, "#c9d1d9", 1060, 295),
+        ("text", "• Dark Theme", 24, "#c9d1d9", 1060, 330),
+        ("text", "───────────────────────────────▶", 36, "#7ee787", 920, 240),
+        ("box", 100, 450, 1720, 200, "#161b22"),
+        ("text", "Supported Protocols", 32, "#7ee787", 120, 470),
+        ("text", "Ethernet • IPv4 • IPv6 • TCP • UDP • ARP • ICMP • LLDP • VLAN (802.1Q) • PTP (1588)", 26, "#c9d1d9", 120, 520),
+        ("text", "MVRP • MRP • CDP • STP • LACP • HomePlug • IGMP • DNS • HTTP • TLS", 26, "#c9d1d9", 120, 560),
+        ("box", 100, 700, 1720, 120, "#161b22"),
+        ("text", "Data Flow", 32, "#58a6ff", 120, 720),
+        ("text", "Network Interface → Packet Capture → Protocol Parsing → Topology Building → SSE Stream → Web UI", 24, "#c9d1d9", 120, 770),
+    ])
+    return [["-loop", "1", "-i", frame]], f"[{base}:v]null"
+
+def create_code_slide1(slide, base=0, tag=""):
+    """Inputs and filtergraph for the packet capture code slide"""
+    frame = draw_slide("code1", [
+        ("text", "Packet Capture - src/capture/mod.rs", 48, "white", 100, 40),
+        ("box", 80, 100, 1760, 520, "#161b22"),
+        ("code", "pub async fn start_capture(iface: String) -> Result<()> {", 24, "#ff7b72", 100, 130),
+        ("code", "    let mut cap = Capture::from_device(iface.as_str())?", 24, "#c9d1d9", 100, 170),
+        ("code", "        .promisc(true)      // Capture all packets", 24, "#8b949e", 100, 210),
+        ("code", "        .snaplen(65535)     // Full packet capture", 24, "#8b949e", 100, 250),
+        ("code", "        .timeout(1000)      // 1 second timeout", 24, "#8b949e", 100, 290),
+        ("code", "        .open()?;", 24, "#c9d1d9", 100, 330),
+        ("code", "    while let Ok(packet) = cap.next_packet() {", 24, "#ff7b72", 100, 410),
+        ("code", "        let info = parse_packet(packet.data);", 24, "#c9d1d9", 100, 450),
+        ("code", "        topology_tx.send(info).await?;  // Send to SSE", 24, "#79c0ff", 100, 490),
+        ("code", "    }", 24, "#c9d1d9", 100, 530),
+        ("code", "}", 24, "#c9d1d9", 100, 570),
+        ("box", 80, 650, 1760, 150, "#238636@0.3"),
+        ("text", "Key Features", 32, "#7ee787", 100, 670),
+        ("text", "• Uses libpcap for cross-platform packet capture", 26, "#c9d1d9", 100, 720),
+        ("text", "• Async streaming to web clients via SSE", 26, "#c9d1d9", 100, 760),
+    ])
+    return [["-loop", "1", "-i", frame]], f"[{base}:v]null"
+
+def create_code_slide2(slide, base=0, tag=""):
+    """Inputs and filtergraph for the protocol parsing code slide"""
+    frame = draw_slide("code2", [
+        ("text", "Protocol Parsing - src/capture/packet.rs", 48, "white", 100, 40),
+        ("box", 80, 100, 1760, 480, "#161b22"),
+        ("code", "fn get_protocol_name(ethertype: u16) -> String {", 24, "#ff7b72", 100, 130),
+        ("code", "    match ethertype {", 24, "#ff7b72", 100, 170),
+        ("code", '        0x0800 => "IPv4".to_string(),', 24, "#a5d6ff", 100, 210),
+        ("code", '        0x0806 => "ARP".to_string(),', 24, "#a5d6ff", 100, 250),
+        ("code", '        0x86DD => "IPv6".to_string(),', 24, "#a5d6ff", 100, 290),
+        ("code", '        0x8100 => "VLAN".to_string(),   // 802.1Q', 24, "#7ee787", 100, 330),
+        ("code", '        0x88CC => "LLDP".to_string(),   // 802.1AB', 24, "#7ee787", 100, 370),
+        ("code", '        0x88F7 => "PTP".to_string(),    // IEEE 1588', 24, "#7ee787", 100, 410),
+        ("code", '        _ => format!("0x{:04X}", ethertype)', 24, "#a5d6ff", 100, 450),
+        ("code", "    }", 24, "#c9d1d9", 100, 490),
+        ("code", "}", 24, "#c9d1d9", 100, 530),
+        ("box", 80, 620, 850, 180, "#161b22"),
+        ("text", "Standard Protocols", 28, "#58a6ff", 100, 640),
+        ("text", "IPv4, IPv6, TCP, UDP", 22, "#c9d1d9", 100, 680),
+        ("text", "ARP, ICMP, DNS, HTTP", 22, "#c9d1d9", 100, 710),
+        ("text", "IGMP, STP, LACP", 22, "#c9d1d9", 100, 740),
+        ("box", 990, 620, 850, 180, "#161b22"),
+        ("text", "TSN Protocols", 28, "#f0883e", 1010, 640),
+        ("text", "VLAN (802.1Q)", 22, "#c9d1d9", 1010, 680),
+        ("text", "LLDP (802.1AB)", 22, "#c9d1d9", 1010, 710),
+        ("text", "PTP (IEEE 1588)", 22, "#c9d1d9", 1010, 740),
+    ])
+    return [["-loop", "1", "-i", frame]], f"[{base}:v]null"
+
+def create_screenshot_slide(slide, base=0, tag=""):
+    """Inputs and filtergraph for a screenshot with overlay"""
     image = f"{PIC_DIR}/{slide['image']}"
     title = slide['title'].replace("'", "\\'")
     desc = slide['desc'].replace("'", "\\'")
 
-    cmd = f'''ffmpeg -y -i "{image}" \
-        -vf "scale={WIDTH}:{HEIGHT}:force_original_aspect_ratio=decrease,pad={WIDTH}:{HEIGHT}:(ow-iw)/2:(oh-ih)/2:color=#0d1117, \
-            drawbox=y=0:w=iw:h=90:color=#0d1117@0.95:t=fill, \
-            drawtext=text='{title}':fontsize=40:fontcolor=white:x=40:y=25, \
-            drawbox=y=ih-80:w=iw:h=80:color=#0d1117@0.95:t=fill, \
-            drawtext=text='{desc}':fontsize=24:fontcolor=#8b949e:x=40:y=h-55" \
-        -frames:v 1 "{output}" 2>/dev/null'''
-    subprocess.run(cmd, shell=True, check=True)
-    print(f"Created screenshot slide: {output}")
-
-def create_closing_slide(idx, slide):
-    """Create closing slide"""
-    output = f"{WORK_DIR}/frame_{idx:02d}.png"
-    icon = f"{PROJECT_DIR}/src-tauri/icons/icon.png"
-
-    cmd = f'''ffmpeg -y -f lavfi -i "color=c=#0d1117:s={WIDTH}x{HEIGHT}:d=1" \
-        -i "{icon}" \
-        -filter_complex " \
-            [1:v]scale=140:140[logo]; \
-            [0:v][logo]overlay=(W-w)/2:(H-h)/2-180[bg]; \
-            [bg]drawtext=text='TSN-Map':fontsize=72:fontcolor=white:x=(w-text_w)/2:y=(h/2)+10, \
-            drawtext=text='Open Source Network Visualization':fontsize=36:fontcolor=#8b949e:x=(w-text_w)/2:y=(h/2)+90, \
-            drawtext=text='github.com/keti/tsn-map':fontsize=32:fontcolor=#58a6ff:x=(w-text_w)/2:y=(h/2)+160, \
-            drawtext=text='Rust • Axum • libpcap • D3.js • Chart.js':fontsize=26:fontcolor=#7ee787:x=(w-text_w)/2:y=(h/2)+220, \
-            drawtext=text='KETI - Korea Electronics Technology Institute':fontsize=24:fontcolor=#6e7681:x=(w-text_w)/2:y=h-80" \
-        -frames:v 1 "{output}" 2>/dev/null'''
-    subprocess.run(cmd, shell=True, check=True)
-    print(f"Created closing slide: {output}")
-
-def create_all_slides():
-    """Create all slides"""
-    for idx, slide in enumerate(SLIDES):
-        slide_type = slide["type"]
-        if slide_type == "title":
-            create_title_slide(idx, slide)
-        elif slide_type == "architecture":
-            create_architecture_slide(idx, slide)
-        elif slide_type == "code1":
-            create_code_slide1(idx, slide)
-        elif slide_type == "code2":
-            create_code_slide2(idx, slide)
-        elif slide_type == "screenshot":
-            create_screenshot_slide(idx, slide)
-        elif slide_type == "closing":
-            create_closing_slide(idx, slide)
+    inputs = [["-loop", "1", "-i", image]]
+    graph = f'''\
+        [{base}:v]scale={WIDTH}:{HEIGHT}:force_original_aspect_ratio=decrease,pad={WIDTH}:{HEIGHT}:(ow-iw)/2:(oh-ih)/2:color=#0d1117, \
+        drawbox=y=0:w=iw:h=90:color=#0d1117@0.95:t=fill, \
+        drawtext=text='{title}':fontsize=40:fontcolor=white:x=40:y=25, \
+        drawbox=y=ih-80:w=iw:h=80:color=#0d1117@0.95:t=fill, \
+        drawtext=text='{desc}':fontsize=24:fontcolor=#8b949e:x=40:y=h-55'''
+    return inputs, graph
+
+def create_closing_slide(slide, base=0, tag=""):
+    """Inputs and filtergraph for the closing slide"""
+    inputs = [["-f", "lavfi", "-i", f"color=c=#0d1117:s={WIDTH}x{HEIGHT}"], ["-i", scaled_icon(ICON, 140, f"{WORK_DIR}/icon_140.png")]]
+    graph = f'''\
+        [{base}:v][{base + 1}:v]overlay=(W-w)/2:(H-h)/2-180[bg{tag}]; \
+        [bg{tag}]drawtext=text='TSN-Map':fontsize=72:fontcolor=white:x=(w-text_w)/2:y=(h/2)+10, \
+        drawtext=text='Open Source Network Visualization':fontsize=36:fontcolor=#8b949e:x=(w-text_w)/2:y=(h/2)+90, \
+        drawtext=text='github.com/keti/tsn-map':fontsize=32:fontcolor=#58a6ff:x=(w-text_w)/2:y=(h/2)+160, \
+        drawtext=text='Rust • Axum • libpcap • D3.js • Chart.js':fontsize=26:fontcolor=#7ee787:x=(w-text_w)/2:y=(h/2)+220, \
+        drawtext=text='KETI - Korea Electronics Technology Institute':fontsize=24:fontcolor=#6e7681:x=(w-text_w)/2:y=h-80'''
+    return inputs, graph
+
+def slide_graph(slide, base=0, tag=""):
+    """Per-input ffmpeg arguments and the filtergraph that draw a slide of any type
+
+    The graph reads its inputs from index base on and suffixes its own labels
+    with tag, so several slides can share one filtergraph.
+    """
+    slide_type = slide["type"]
+    if slide_type == "title":
+        return create_title_slide(slide, base, tag)
+    elif slide_type == "architecture":
+        return create_architecture_slide(slide, base, tag)
+    elif slide_type == "code1":
+        return create_code_slide1(slide, base, tag)
+    elif slide_type == "code2":
+        return create_code_slide2(slide, base, tag)
+    elif slide_type == "screenshot":
+        return create_screenshot_slide(slide, base, tag)
+    elif slide_type == "closing":
+        return create_closing_slide(slide, base, tag)
+
+def narrate(idx, slide):
+    """Generate one slide's narration and return its duration"""
+    output = f"{WORK_DIR}/audio_{idx:02d}.mp3"
+    key = stamp([slide["tts"], USE_PIPER])
+    if not up_to_date(output, key):
+        generate_tts(slide["tts"], output)
+        record_stamp(output, key)
+    return get_audio_duration(output)
 
 def generate_all_tts():
     """Generate TTS audio for all slides"""
-    for idx, slide in enumerate(SLIDES):
-        output = f"{WORK_DIR}/audio_{idx:02d}.mp3"
-        generate_tts(slide["tts"], output)
-
-        # Get actual audio duration and update slide
-        duration = get_audio_duration(output)
-        SLIDES[idx]["actual_duration"] = max(duration + 1.0, slide["duration"])  # Add 1 second buffer
-
-def combine_audio():
-    """Combine all audio files with silence gaps"""
-    combined = AudioSegment.empty()
-
-    for idx, slide in enumerate(SLIDES):
-        audio_file = f"{WORK_DIR}/audio_{idx:02d}.mp3"
-        audio = AudioSegment.from_mp3(audio_file)
-
-        # Add audio
-        combined += audio
-
-        # Add silence to match duration
-        actual_duration = slide.get("actual_duration", slide["duration"])
-        silence_duration = (actual_duration * 1000) - len(audio)
-        if silence_duration > 0:
-            combined += AudioSegment.silent(duration=int(silence_duration))
-
-    output = f"{WORK_DIR}/combined_audio.mp3"
-    combined.export(output, format="mp3")
-    print(f"Combined audio: {output}")
-    return output
+    # gTTS requests are network round-trips, so send them all at once;
+    # Piper is CPU-bound, so run one per core
+    with ThreadPoolExecutor(max_workers=os.cpu_count() if USE_PIPER else len(SLIDES)) as pool:
+        durations = list(pool.map(narrate, range(len(SLIDES)), SLIDES))
+
+    for slide, duration in zip(SLIDES, durations):
+        slide["actual_duration"] = max(duration + 1.0, slide["duration"])  # Add 1 second buffer
+
+def slide_durations():
+    """How long each slide is held: its narration plus buffer, or its nominal duration"""
+    return [slide.get("actual_duration", slide["duration"]) for slide in SLIDES]
+
+def fades(duration):
+    """Half-second fade in and out for a slide held for duration"""
+    return f"fade=t=in:st=0:d=0.5,fade=t=out:st={duration - 0.5:.3f}:d=0.5"
+
+def create_clip(idx, slide, duration):
+    """Draw a slide and encode it with its narration in one ffmpeg run"""
+    clip = f"{WORK_DIR}/clip_{idx:02d}.mp4"
+    key = slide_stamp(idx, slide)
+    if up_to_date(clip, key):
+        print(f"Clip {idx} is up to date")
+        return clip
+
+    inputs, graph = slide_graph(slide)
+    audio = f"{WORK_DIR}/audio_{idx:02d}.mp3"
+
+    # The narration follows the slide's own inputs; it is padded with
+    # silence so the slide holds for its full duration, fading in and out
+    ffmpeg("-filter_complex_threads", str(CLIP_THREADS),
+           *(arg for args in inputs for arg in args), "-i", audio,
+           "-filter_complex", f"{graph},{fades(duration)},format=yuv420p[v]; [{len(inputs)}:a]apad[a]",
+           "-map", "[v]", "-map", "[a]",
+           "-c:v", "libx264", "-preset", "ultrafast", "-tune", "stillimage", "-g", "1", "-crf", "23",
+           "-c:a", "aac", "-b:a", "128k",
+           "-t", str(duration), "-r", "30", "-threads", str(CLIP_THREADS),
+           clip)
+    record_stamp(clip, key)
+    print(f"Created clip {idx}")
+    return clip
 
 def create_video():
-    """Create final video with all slides and audio"""
-    # Build input arguments
-    inputs = []
-    filter_parts = []
-
+    """Create final video with all slides and audio in one ffmpeg run"""
+    graphs = []
+    audio_base = 0
     for idx, slide in enumerate(SLIDES):
-        duration = slide.get("actual_duration", slide["duration"])
-        inputs.append(f'-loop 1 -t {duration} -i "{WORK_DIR}/frame_{idx:02d}.png"')
-        filter_parts.append(f'[{idx}:v]scale={WIDTH}:{HEIGHT},setsar=1,format=yuv420p[v{idx}]')
-
-    # Build xfade chain
-    xfade_parts = []
-    offset = 0
-    fade_duration = 0.5
-
-    for idx in range(len(SLIDES) - 1):
-        current_duration = SLIDES[idx].get("actual_duration", SLIDES[idx]["duration"])
-        offset = offset + current_duration - fade_duration if idx > 0 else current_duration - fade_duration
-
-        if idx == 0:
-            xfade_parts.append(f'[v0][v1]xfade=transition=fade:duration={fade_duration}:offset={offset:.1f}[f1]')
-        else:
-            xfade_parts.append(f'[f{idx}][v{idx+1}]xfade=transition=fade:duration={fade_duration}:offset={offset:.1f}[f{idx+1}]')
-
-    # Final output label
-    final_label = f'f{len(SLIDES)-1}'
-
-    # Build filter complex
-    filter_complex = '; '.join(filter_parts) + '; ' + '; '.join(xfade_parts) + f',format=yuv420p[vout]'
-
-    # Build command
-    input_str = ' '.join(inputs)
-    audio_file = f"{WORK_DIR}/combined_audio.mp3"
-
-    cmd = f'''ffmpeg -y {input_str} -i "{audio_file}" \
-        -filter_complex "{filter_complex}" \
-        -map "[vout]" -map {len(SLIDES)}:a \
-        -c:v libx264 -preset medium -crf 20 \
-        -c:a aac -b:a 192k \
-        -r 30 -pix_fmt yuv420p \
-        -shortest \
-        "{OUTPUT_VIDEO}"'''
-
-    print("Creating video...")
-    print(f"Command length: {len(cmd)} chars")
-
-    result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"Error: {result.stderr}")
+        graphs.append(slide_graph(slide, audio_base, idx))
+        audio_base += len(graphs[-1][0])
+    args = []
+    parts = []
+    pairs = ""
+
+    for idx, ((inputs, graph), duration) in enumerate(zip(graphs, slide_durations())):
+        # Every input of the slide is cut to its duration; the narration is padded to it
+        parts.append(f"{graph},{fades(duration)},fps=30[v{idx}]")
+        parts.append(f"[{audio_base + idx}:a]apad=whole_dur={duration:.3f}[a{idx}]")
+        pairs += f"[v{idx}][a{idx}]"
+        args += [["-t", f"{duration:.3f}", *input_args] for input_args in inputs]
+
+    audio = [arg for idx in range(len(SLIDES)) for arg in ("-i", f"{WORK_DIR}/audio_{idx:02d}.mp3")]
+    # The single encode is the whole video's cost, so hand it to the GPU when there is one
+    encoder, (hwdev, vfilter, vcodec) = pick_encoder(x264_preset="ultrafast")
+    filter_complex = ("; ".join(parts) +
+                      f"; {pairs}concat=n={len(SLIDES)}:v=1:a=1[vc][aout]; [vc]{vfilter}[vout]")
+
+    print(f"Creating video in one pass ({encoder})...")
+    try:
+        ffmpeg(*hwdev, *(arg for input_args in args for arg in input_args), *audio,
+               "-filter_complex", filter_complex,
+               "-map", "[vout]", "-map", "[aout]",
+               *vcodec,
+               "-c:a", "aac", "-b:a", "128k",
+               "-r", "30", "-movflags", "+faststart",
+               OUTPUT_VIDEO)
+    except subprocess.CalledProcessError:
         # Try simpler approach
+        print("One-pass encode failed")
         create_video_simple()
     else:
         print(f"Video created: {OUTPUT_VIDEO}")
@@ -432,23 +510,9 @@ def create_video_simple():
     """Create video using simpler concat approach"""
     print("Using simpler concat approach...")
 
-    # Create individual video clips with audio
-    clips = []
-    for idx, slide in enumerate(SLIDES):
-        duration = slide.get("actual_duration", slide["duration"])
-        frame = f"{WORK_DIR}/frame_{idx:02d}.png"
-        audio = f"{WORK_DIR}/audio_{idx:02d}.mp3"
-        clip = f"{WORK_DIR}/clip_{idx:02d}.mp4"
-
-        cmd = f'''ffmpeg -y -loop 1 -t {duration} -i "{frame}" -i "{audio}" \
-            -c:v libx264 -preset fast -crf 22 \
-            -c:a aac -b:a 128k \
-            -vf "scale={WIDTH}:{HEIGHT},format=yuv420p" \
-            -shortest -r 30 \
-            "{clip}" 2>/dev/null'''
-        subprocess.run(cmd, shell=True, check=True)
-        clips.append(clip)
-        print(f"Created clip {idx}")
+    # Create individual video clips with audio, straight from the slide filtergraphs
+    with ThreadPoolExecutor(max_workers=CLIP_WORKERS) as pool:
+        clips = list(pool.map(create_clip, range(len(SLIDES)), SLIDES, slide_durations()))
 
     # Create concat list
     concat_file = f"{WORK_DIR}/concat.txt"
@@ -456,12 +520,10 @@ def create_video_simple():
         for clip in clips:
             f.write(f"file '{clip}'\n")
 
-    # Concat all clips
-    cmd = f'''ffmpeg -y -f concat -safe 0 -i "{concat_file}" \
-        -c:v libx264 -preset medium -crf 20 \
-        -c:a aac -b:a 192k \
-        "{OUTPUT_VIDEO}" 2>/dev/null'''
-    subprocess.run(cmd, shell=True, check=True)
+    # Concat all clips; they share codec parameters, so this is a remux
+    ffmpeg("-f", "concat", "-safe", "0", "-i", concat_file,
+           "-c:v", "copy", "-c:a", "copy",
+           OUTPUT_VIDEO)
     print(f"Video created: {OUTPUT_VIDEO}")
 
 def main():
@@ -472,21 +534,19 @@ def main():
     # Create working directory
     create_work_dir()
 
-    # Create all slides
-    print("\n[1/4] Creating slides...")
-    create_all_slides()
-
     # Generate TTS
-    print("\n[2/4] Generating TTS narration...")
+    print("\n[1/2] Generating TTS narration...")
     generate_all_tts()
 
-    # Combine audio
-    print("\n[3/4] Combining audio...")
-    combine_audio()
-
-    # Create video
-    print("\n[4/4] Creating video...")
-    create_video_simple()
+    # Create video in one pass, falling back to per-slide clips
+    print("\n[2/2] Creating video...")
+    key = stamp([slide_stamp(idx, slide) for idx, slide in enumerate(SLIDES)])
+    if up_to_date(OUTPUT_VIDEO, key):
+        print(f"Video is up to date: {OUTPUT_VIDEO}")
+    else:
+        create_video()
+        record_stamp(OUTPUT_VIDEO, key)
+    save_stamps()
 
     # Cleanup
     print("\nCleaning up...")
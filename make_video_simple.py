@@ -3,29 +3,18 @@
 TSN-Map Demo Video Creator - Simple Version
 Run: python3 make_video_simple.py
 """
-import subprocess
+import asyncio
 import os
-import sys
-
-def run(cmd, check=True):
-    print(f"$ {cmd}")
-    result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-    if result.stdout:
-        print(result.stdout)
-    if result.stderr:
-        print(result.stderr, file=sys.stderr)
-    if check and result.returncode != 0:
-        print(f"Error: Command failed with code {result.returncode}")
-    return result.returncode == 0
+
+from video_common import encode_one_pass, encode_segments, import_or_install, link_or_copy, pick_encoder, remove_in_background, render_frames
 
 def main():
     print("=" * 50)
     print("TSN-Map Demo Video Creator")
     print("=" * 50)
 
-    # Install edge-tts
-    print("\n[1/5] Installing edge-tts...")
-    run("pip3 install --break-system-packages edge-tts", check=False)
+    print("\n[1/5] Checking edge-tts...")
+    edge_tts = import_or_install("edge_tts", "edge-tts")
 
     # Setup directories
     base = "/home/kim/tsn-map"
@@ -48,7 +37,7 @@ def main():
 
     print("\n[2/5] Copying screenshots...")
     for src, dst in screenshots:
-        run(f'cp "{base}/pic/{src}" "{dst}"', check=False)
+        link_or_copy(f"{base}/pic/{src}", dst)
 
     # TTS narrations
     print("\n[3/5] Generating TTS narration...")
@@ -67,27 +56,61 @@ def main():
         ("a10.mp3", "Thank you for watching. TSN-Map is open source by KETI."),
     ]
 
-    for fname, text in narrations:
-        run(f'edge-tts --voice {voice} --text "{text}" --write-media {fname}')
+    # Each narration is a round-trip to the TTS service; drive them all from one event loop
+    # in this process rather than starting an edge-tts interpreter per line
+    async def synthesize(fname, text, limit):
+        """Speak one narration, returning its file name if it failed"""
+        async with limit:
+            try:
+                await edge_tts.Communicate(text, voice).save(fname)
+            except Exception as e:
+                print(f"  {fname} FAILED: {e}")
+                if os.path.exists(fname):
+                    os.remove(fname)
+                return fname
+        print(f"  {fname} done")
+
+    async def synthesize_all():
+        # A few at a time: the service throttles a burst of simultaneous connections
+        limit = asyncio.Semaphore(4)
+        return await asyncio.gather(*(synthesize(fname, text, limit) for fname, text in narrations))
+
+    missing = [fname for fname in asyncio.run(synthesize_all()) if fname]
+    if missing:
+        print(f"\nError: no narration for {', '.join(missing)}; not creating the video")
+        os.chdir(base)
+        remove_in_background(work)
+        return
 
     # Create frames
     print("\n[4/5] Creating video frames...")
     icon = f"{base}/src-tauri/icons/icon.png"
-
-    # Title frame
-    run(f'''ffmpeg -y -f lavfi -i "color=c=#0d1117:s=1920x1080:d=1" -i "{icon}" \
-        -filter_complex "[1:v]scale=140:140[logo];[0:v][logo]overlay=(W-w)/2:(H-h)/2-140[bg]; \
-        [bg]drawtext=text='TSN-Map':fontsize=80:fontcolor=white:x=(w-text_w)/2:y=(h/2)+30, \
-        drawtext=text='Network Topology Visualization':fontsize=32:fontcolor=#888888:x=(w-text_w)/2:y=(h/2)+120" \
-        -frames:v 1 f00.png''')
-
-    # Architecture frame
-    run(f'''ffmpeg -y -f lavfi -i "color=c=#0d1117:s=1920x1080:d=1" \
-        -vf "drawtext=text='Architecture':fontsize=60:fontcolor=white:x=(w-text_w)/2:y=80, \
-        drawtext=text='Backend\\: Rust + Axum + libpcap':fontsize=36:fontcolor=#58a6ff:x=(w-text_w)/2:y=300, \
-        drawtext=text='Frontend\\: D3.js + Chart.js + SSE':fontsize=36:fontcolor=#f0883e:x=(w-text_w)/2:y=400, \
-        drawtext=text='Protocols\\: Ethernet, IPv4/6, TCP, UDP, ARP, LLDP, VLAN, PTP':fontsize=28:fontcolor=#7ee787:x=(w-text_w)/2:y=550" \
-        -frames:v 1 f01.png''')
+    text_frames = [
+        ("f00.png", [("TSN-Map", 80, "white", 570),
+                     ("Network Topology Visualization", 32, "#888888", 660)], (140, 330),
+         ["ffmpeg", "-y", "-f", "lavfi", "-i", "color=c=#0d1117:s=1920x1080:d=1", "-i", icon,
+          "-filter_complex", "[1:v]scale=140:140[logo];[0:v][logo]overlay=(W-w)/2:(H-h)/2-140[bg];"
+          "[bg]drawtext=text='TSN-Map':fontsize=80:fontcolor=white:x=(w-text_w)/2:y=(h/2)+30,"
+          "drawtext=text='Network Topology Visualization':fontsize=32:fontcolor=#888888:x=(w-text_w)/2:y=(h/2)+120",
+          "-frames:v", "1", "f00.png"]),
+        ("f01.png", [("Architecture", 60, "white", 80),
+                     ("Backend: Rust + Axum + libpcap", 36, "#58a6ff", 300),
+                     ("Frontend: D3.js + Chart.js + SSE", 36, "#f0883e", 400),
+                     ("Protocols: Ethernet, IPv4/6, TCP, UDP, ARP, LLDP, VLAN, PTP", 28, "#7ee787", 550)], None,
+         ["ffmpeg", "-y", "-f", "lavfi", "-i", "color=c=#0d1117:s=1920x1080:d=1",
+          "-vf", "drawtext=text='Architecture':fontsize=60:fontcolor=white:x=(w-text_w)/2:y=80,"
+          "drawtext=text='Backend\\: Rust + Axum + libpcap':fontsize=36:fontcolor=#58a6ff:x=(w-text_w)/2:y=300,"
+          "drawtext=text='Frontend\\: D3.js + Chart.js + SSE':fontsize=36:fontcolor=#f0883e:x=(w-text_w)/2:y=400,"
+          "drawtext=text='Protocols\\: Ethernet, IPv4/6, TCP, UDP, ARP, LLDP, VLAN, PTP':fontsize=28:fontcolor=#7ee787:x=(w-text_w)/2:y=550",
+          "-frames:v", "1", "f01.png"]),
+        ("f10.png", [("TSN-Map", 60, "white", 560),
+                     ("Open Source - KETI", 28, "#888888", 640)], (100, 370),
+         ["ffmpeg", "-y", "-f", "lavfi", "-i", "color=c=#0d1117:s=1920x1080:d=1", "-i", icon,
+          "-filter_complex", "[1:v]scale=100:100[logo];[0:v][logo]overlay=(W-w)/2:(H-h)/2-120[bg];"
+          "[bg]drawtext=text='TSN-Map':fontsize=60:fontcolor=white:x=(w-text_w)/2:y=(h/2)+20,"
+          "drawtext=text='Open Source - KETI':fontsize=28:fontcolor=#888888:x=(w-text_w)/2:y=(h/2)+100",
+          "-frames:v", "1", "f10.png"]),
+    ]
 
     # Screenshot frames
     frames = [
@@ -101,21 +124,10 @@ def main():
         ("s08_large.png", "f09.png", "Large Scale"),
     ]
 
-    for src, dst, title in frames:
-        run(f'''ffmpeg -y -i {src} -vf "scale=1920:1080:force_original_aspect_ratio=decrease,pad=1920:1080:(ow-iw)/2:(oh-ih)/2:color=#0d1117, \
-            drawbox=y=0:w=iw:h=70:color=#0d1117@0.9:t=fill, \
-            drawtext=text='{title}':fontsize=32:fontcolor=white:x=30:y=18" \
-            -frames:v 1 {dst}''')
-
-    # Closing frame
-    run(f'''ffmpeg -y -f lavfi -i "color=c=#0d1117:s=1920x1080:d=1" -i "{icon}" \
-        -filter_complex "[1:v]scale=100:100[logo];[0:v][logo]overlay=(W-w)/2:(H-h)/2-120[bg]; \
-        [bg]drawtext=text='TSN-Map':fontsize=60:fontcolor=white:x=(w-text_w)/2:y=(h/2)+20, \
-        drawtext=text='Open Source - KETI':fontsize=28:fontcolor=#888888:x=(w-text_w)/2:y=(h/2)+100" \
-        -frames:v 1 f10.png''')
-
-    # Create video segments
-    print("\n[5/5] Creating video segments...")
+    render_frames(icon, text_frames, frames, f"{base}/pic/cache")
+
+    # Create video
+    print("\n[5/5] Creating video...")
     segments = [
         ("f00.png", "a00.mp3", "v00.mp4"),
         ("f01.png", "a01.mp3", "v01.mp4"),
@@ -130,25 +142,24 @@ def main():
         ("f10.png", "a10.mp3", "v10.mp4"),
     ]
 
-    for frame, audio, video in segments:
-        run(f'ffmpeg -y -loop 1 -i {frame} -i {audio} -c:v libx264 -tune stillimage -c:a aac -shortest -pix_fmt yuv420p {video}')
-
-    # Concat list
-    with open("concat.txt", "w") as f:
-        for _, _, video in segments:
-            f.write(f"file '{video}'\n")
-
     # Final video
     output = f"{base}/tsn-map-demo-full.mp4"
-    run(f'ffmpeg -y -f concat -safe 0 -i concat.txt -c:v libx264 -crf 20 -c:a aac "{output}"')
+    # Two frames a second with a keyframe every second
+    encoder, options = pick_encoder(gop=2)
+    print(f"Encoder: {encoder}")
+    if not encode_one_pass(segments, output, options):
+        print("One-pass encode failed, falling back to per-segment encodes")
+        encode_segments(segments, output)
 
     print("\n" + "=" * 50)
-    print(f"Done! Video: {output}")
-    run(f'ls -lh "{output}"')
+    if os.path.exists(output):
+        print(f"Done! Video: {output}  {os.stat(output).st_size / 1024 / 1024:.1f} MiB")
+    else:
+        print(f"Error: {output} was not created")
 
     # Cleanup
     os.chdir(base)
-    run(f'rm -rf "{work}"', check=False)
+    remove_in_background(work)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,264 @@
+"""Helpers shared by the video scripts"""
+import functools
+import hashlib
+import importlib
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image, ImageDraw, ImageFont, ImageOps
+except ImportError:
+    Image = None
+
+# ffmpeg fallback for screenshot_frame(); only the file names and title change between frames
+FRAME_CMD = ["ffmpeg", "-y", "-i", "{src}",
+             "-vf", "scale=1920:1080:force_original_aspect_ratio=decrease,pad=1920:1080:(ow-iw)/2:(oh-ih)/2:color=#0d1117,"
+             "drawbox=y=0:w=iw:h=70:color=#0d1117@0.9:t=fill,"
+             "drawtext=text='{title}':fontsize=32:fontcolor=white:x=30:y=18",
+             "-frames:v", "1", "{dst}"]
+
+VAAPI_DEVICE = "/dev/dri/renderD128"
+
+def run(cmd, check=True):
+    print(f"$ {shlex.join(cmd)}")
+    if cmd[0] == "ffmpeg":
+        # Errors only: the banner and per-frame progress would just pile up in the capture buffer
+        cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-nostats", *cmd[1:]]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.stdout:
+        print(result.stdout)
+    if result.stderr:
+        print(result.stderr, file=sys.stderr)
+    if check and result.returncode != 0:
+        print(f"Error: Command failed with code {result.returncode}")
+    return result.returncode == 0
+
+def import_or_install(module, package):
+    """Import a module, pip-installing its package first if it is missing"""
+    # pip's resolver costs seconds even when it has nothing to do, so only run it on a failed import
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        run([sys.executable, "-m", "pip", "install", "--break-system-packages", "--quiet", package])
+        importlib.invalidate_caches()
+        return importlib.import_module(module)
+
+def remove_in_background(path):
+    """Delete a directory tree without making the caller wait for it"""
+    # Non-daemon, so the interpreter waits for the delete to finish before exiting
+    threading.Thread(target=shutil.rmtree, args=(path,), kwargs={"ignore_errors": True}).start()
+
+def link_or_copy(src, dst):
+    """Hard-link src to dst, copying when the filesystem can't link"""
+    if os.path.lexists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+def cached_frame(cmd, out, cache_dir, deps=()):
+    """Run a frame command, reusing its PNG from cache_dir while the command and deps are unchanged"""
+    key = hashlib.sha1("\0".join([*cmd, *(str(os.path.getmtime(d)) for d in deps)]).encode()).hexdigest()[:16]
+    cached = f"{cache_dir}/{key}.png"
+    if os.path.exists(cached):
+        link_or_copy(cached, out)
+        return True
+    # out may be a hard link into the cache from an earlier run; never write through it
+    if os.path.lexists(out):
+        os.remove(out)
+    if not run(cmd):
+        return False
+    os.makedirs(cache_dir, exist_ok=True)
+    shutil.copyfile(out, cached)
+    return True
+
+def save_frame(canvas, dst):
+    """Write a frame drawn with Pillow to dst as a new file"""
+    # dst may be a hard link into the frame cache left by an ffmpeg run; never write through it
+    if os.path.lexists(dst):
+        os.remove(dst)
+    # An intermediate frame: favour save speed over file size
+    canvas.save(dst, compress_level=1)
+
+def screenshot_frame(src, dst, title, font):
+    """Letterbox a screenshot to 1920x1080 under a title bar, drawn in-process with Pillow"""
+    canvas = Image.new("RGB", (1920, 1080), "#0d1117")
+    with Image.open(src) as img:
+        img = ImageOps.contain(img.convert("RGB"), (1920, 1080), Image.LANCZOS)
+    canvas.paste(img, ((1920 - img.width) // 2, (1080 - img.height) // 2))
+    draw = ImageDraw.Draw(canvas, "RGBA")
+    draw.rectangle([0, 0, 1919, 69], fill=(13, 17, 23, 230))
+    draw.text((30, 18), title, fill="white", font=font)
+    save_frame(canvas, dst)
+
+def draw_text_frame(lines, logo=None):
+    """Draw centred (text, size, colour, y) lines and an optional (image, y) logo on a blank frame"""
+    canvas = Image.new("RGB", (1920, 1080), "#0d1117")
+    if logo:
+        img, y = logo
+        canvas.paste(img, ((1920 - img.width) // 2, y), img)
+    draw = ImageDraw.Draw(canvas)
+    for text, size, colour, y in lines:
+        font = load_font(size)
+        draw.text(((1920 - draw.textlength(text, font=font)) / 2, y), text, fill=colour, font=font)
+    return canvas
+
+def text_frame(dst, lines, logo=None):
+    """Write a draw_text_frame() frame to dst"""
+    save_frame(draw_text_frame(lines, logo), dst)
+
+def scaled_icon(icon, size, dst):
+    """Scale icon to size x size at dst, redone only when icon changes; returns dst"""
+    if not (os.path.exists(dst) and os.path.getmtime(dst) >= os.path.getmtime(icon)):
+        if Image:
+            with Image.open(icon) as img:
+                img.convert("RGBA").resize((size, size), Image.LANCZOS).save(dst)
+        else:
+            subprocess.run(["ffmpeg", "-y", "-i", icon, "-vf", f"scale={size}:{size}", dst],
+                           stderr=subprocess.DEVNULL)
+    return dst
+
+@functools.lru_cache(maxsize=None)
+def load_font(size, mono=False):
+    """DejaVu Sans (or Sans Mono) at the given size, loaded once, or Pillow's default font scaled to it"""
+    name = "DejaVuSansMono.ttf" if mono else "DejaVuSans.ttf"
+    try:
+        return ImageFont.truetype(name, size)
+    except OSError:
+        pass
+    try:
+        # Pillow 10.1+ can draw its built-in font at any size
+        return ImageFont.load_default(size)
+    except TypeError:
+        raise RuntimeError(f"{name} not found and this Pillow's default font has a fixed size; "
+                           "install the DejaVu fonts or Pillow 10.1+") from None
+
+def render_frames(icon, text_frames, screenshots, cache_dir):
+    """Render (dst, lines, logo, ffmpeg command) text frames and (src, dst, title) screenshot frames
+
+    logo is the (size, y) of the icon on the frame, or None. Without Pillow the
+    text frames come from their ffmpeg commands, cached in cache_dir.
+    """
+    # The frames share no inputs or outputs, so render all of them at once
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+        jobs = []
+        if Image:
+            # Decode the icon once and scale it for every frame that shows it
+            with Image.open(icon) as img:
+                logo_image = img.convert("RGBA")
+            for dst, lines, logo, _ in text_frames:
+                if logo:
+                    size, y = logo
+                    logo = (logo_image.resize((size, size), Image.LANCZOS), y)
+                jobs.append(pool.submit(text_frame, dst, lines, logo))
+            font = load_font(32)
+            for src, dst, title in screenshots:
+                jobs.append(pool.submit(screenshot_frame, src, dst, title, font))
+        else:
+            # The text frames only change with their command or the icon
+            for dst, _, logo, cmd in text_frames:
+                jobs.append(pool.submit(cached_frame, cmd, dst, cache_dir, [icon] if logo else []))
+            for src, dst, title in screenshots:
+                jobs.append(pool.submit(run, [arg.format(src=src, dst=dst, title=title) for arg in FRAME_CMD]))
+
+        for job in jobs:
+            job.result()
+
+def media_duration(path):
+    """Length of a media file in seconds, as reported by ffprobe"""
+    result = subprocess.run(["ffprobe", "-v", "error", "-show_entries", "format=duration",
+                             "-of", "csv=p=0", path], capture_output=True, text=True, check=True)
+    return float(result.stdout)
+
+def encoder_options(encoder, gop=None, x264_preset="veryfast"):
+    """Return (global options, pixel-format filter, codec options) for an H.264 encoder
+
+    gop is the keyframe interval in frames, left to the encoder when None;
+    x264_preset only applies to libx264.
+    """
+    keyint = ["-g", str(gop)] if gop else []
+    if encoder == "h264_nvenc":
+        return [], "format=yuv420p", ["-c:v", "h264_nvenc", "-preset", "p5", "-rc", "vbr", "-cq", "20", "-b:v", "0", *keyint]
+    if encoder == "h264_vaapi":
+        return ["-vaapi_device", VAAPI_DEVICE], "format=nv12,hwupload", ["-c:v", "h264_vaapi", "-qp", "22", *keyint]
+    if encoder == "h264_videotoolbox":
+        return [], "format=yuv420p", ["-c:v", "h264_videotoolbox", "-b:v", "6M", *keyint]
+    x264 = ["-x264-params", f"keyint={gop}:scenecut=0"] if gop else []
+    return [], "format=yuv420p", ["-c:v", "libx264", "-preset", x264_preset, "-tune", "stillimage", "-crf", "20", *x264]
+
+@functools.lru_cache(maxsize=None)
+def pick_encoder(gop=None, x264_preset="veryfast"):
+    """First hardware H.264 encoder that can encode a test clip here, else libx264
+
+    Returns the encoder and its encoder_options() for the same arguments; the
+    test clip is encoded with exactly those options, so they are what passed.
+    """
+    for encoder in ["h264_nvenc", "h264_vaapi", "h264_videotoolbox"]:
+        options = encoder_options(encoder, gop, x264_preset)
+        hwdev, vfilter, vcodec = options
+        probe = subprocess.run(["ffmpeg", "-hide_banner", "-loglevel", "error", *hwdev,
+                                "-f", "lavfi", "-i", "color=s=256x256:d=0.1", "-vf", vfilter, *vcodec, "-f", "null", "-"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if probe.returncode == 0:
+            return encoder, options
+    return "libx264", encoder_options("libx264", gop, x264_preset)
+
+def encode_one_pass(segments, output, options):
+    """Hold each (frame, audio, _) segment's frame for its narration and encode the whole video in one ffmpeg run
+
+    options are the encoder_options() to encode with, as returned by pick_encoder(gop=2).
+    """
+    # The narrations stay as MP3 files rather than being piped in: from a pipe ffprobe reports
+    # no duration for an MP3, and the per-segment fallback reads them again
+    try:
+        with ThreadPoolExecutor(max_workers=len(segments)) as pool:
+            durations = list(pool.map(media_duration, [audio for _, audio, _ in segments]))
+    except (OSError, ValueError, subprocess.CalledProcessError):
+        return False
+
+    inputs = []
+    holds = ""
+    pairs = ""
+    for i, ((frame, audio, _), duration) in enumerate(zip(segments, durations)):
+        # A still needs only two frames a second; a GOP of 2 keeps a keyframe every second for seeking.
+        # Each PNG is decoded once and the loop filter repeats that frame, where -loop 1 would
+        # have the image demuxer read and decode the file again for every output frame
+        inputs += ["-framerate", "2", "-i", frame, "-i", audio]
+        holds += f"[{2 * i}:v]loop=loop=-1:size=1,trim=duration={duration:.3f}[s{i}]; "
+        pairs += f"[s{i}][{2 * i + 1}:a]"
+    hwdev, vfilter, vcodec = options
+    return run(["ffmpeg", "-y", *hwdev, *inputs,
+                "-filter_complex", f"{holds}{pairs}concat=n={len(segments)}:v=1:a=1[vc][a]; [vc]{vfilter}[v]",
+                "-map", "[v]", "-map", "[a]", *vcodec,
+                "-c:a", "aac", "-movflags", "+faststart", output])
+
+def encode_segments(segments, output):
+    """Encode every (frame, audio, clip) segment as its own clip, then concatenate the clips"""
+    # This is the fallback for a failed one-pass encode, so it sticks to libx264
+    # Segments are independent, so run one encoder per core and split the cores between them;
+    # x264's default of one thread per core in every encoder would oversubscribe the machine
+    nproc = os.cpu_count() or 1
+    parallel = min(len(segments), nproc)
+    threads = max(1, nproc // parallel)
+    _, _, vcodec = encoder_options("libx264", gop=2)
+
+    def encode(segment):
+        frame, audio, video = segment
+        return run(["ffmpeg", "-y", "-loop", "1", "-framerate", "2", "-i", frame, "-i", audio, "-r", "2", *vcodec,
+                    "-c:a", "aac", "-shortest", "-pix_fmt", "yuv420p", "-threads", str(threads), video])
+
+    with ThreadPoolExecutor(max_workers=parallel) as pool:
+        list(pool.map(encode, segments))
+
+    # Concat list
+    with open("concat.txt", "w") as f:
+        for _, _, video in segments:
+            f.write(f"file '{video}'\n")
+
+    run(["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", "concat.txt", "-c", "copy", "-movflags", "+faststart", output])
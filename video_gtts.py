@@ -2,23 +2,17 @@
 """TSN-Map Video Creator using gTTS"""
 import os
 import sys
-import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from video_common import encode_one_pass, encode_segments, import_or_install, link_or_copy, pick_encoder, remove_in_background, render_frames
 
 # Change to valid directory first
 os.chdir("/home/kim/tsn-map")
 
-def run(cmd):
-    print(f"$ {cmd[:80]}..." if len(cmd) > 80 else f"$ {cmd}")
-    r = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-    if r.stdout: print(r.stdout)
-    if r.stderr and r.returncode != 0: print(r.stderr)
-    return r.returncode == 0
-
 print("=== TSN-Map Video Creator (gTTS) ===\n")
 
-# Install gTTS
-print("[1/6] Installing gTTS...")
-run("pip3 install --break-system-packages --quiet gtts")
+print("[1/6] Checking gTTS...")
+gTTS = import_or_install("gtts", "gtts").gTTS
 
 # Setup
 work = "/home/kim/tsn-map/pic/video_work"
@@ -39,11 +33,10 @@ pics = [
     ("Screenshot from 2026-01-19 15-18-44.png", "s08.png"),
 ]
 for src, dst in pics:
-    run(f'cp "/home/kim/tsn-map/pic/{src}" "{dst}"')
+    link_or_copy(f"/home/kim/tsn-map/pic/{src}", dst)
 
 # Generate TTS with gTTS
 print("\n[3/6] Generating TTS with gTTS...")
-from gtts import gTTS
 
 narrations = [
     ("a00.mp3", "Welcome to TSN Map. A real-time network topology visualization tool. Built with Rust and D3.js by KETI."),
@@ -59,50 +52,63 @@ narrations = [
     ("a10.mp3", "Thank you for watching. TSN Map is open source by KETI."),
 ]
 
-for fname, text in narrations:
-    tts = gTTS(text=text, lang='en', slow=False)
-    tts.save(fname)
+def synthesize(narration):
+    """Speak one narration, returning its file name if it failed"""
+    fname, text = narration
+    try:
+        tts = gTTS(text=text, lang='en', slow=False)
+        tts.save(fname)
+    except Exception as e:
+        print(f"  {fname} FAILED: {e}")
+        if os.path.exists(fname):
+            os.remove(fname)
+        return fname
     print(f"  {fname} done")
 
+# Each narration is a round-trip to Google; wait on all of them at once
+with ThreadPoolExecutor(max_workers=len(narrations)) as pool:
+    missing = [fname for fname in pool.map(synthesize, narrations) if fname]
+if missing:
+    print(f"\nError: no narration for {', '.join(missing)}; not creating the video")
+    os.chdir("/home/kim/tsn-map")
+    remove_in_background(work)
+    sys.exit(1)
+
 # Create frames
 print("\n[4/6] Creating video frames...")
 icon = "/home/kim/tsn-map/src-tauri/icons/icon.png"
-
-# Title frame
-run(f'''ffmpeg -y -f lavfi -i color=c=#0d1117:s=1920x1080:d=1 -i "{icon}" -filter_complex "[1:v]scale=140:140[l];[0:v][l]overlay=(W-w)/2:(H-h)/2-140[b];[b]drawtext=text='TSN-Map':fontsize=80:fontcolor=white:x=(w-text_w)/2:y=(h/2)+30,drawtext=text='Network Topology Visualization':fontsize=32:fontcolor=#888888:x=(w-text_w)/2:y=(h/2)+110,drawtext=text='KETI':fontsize=24:fontcolor=#666666:x=(w-text_w)/2:y=h-60" -frames:v 1 f00.png 2>/dev/null''')
-
-# Arch frame
-run('''ffmpeg -y -f lavfi -i color=c=#0d1117:s=1920x1080:d=1 -vf "drawtext=text='Architecture':fontsize=56:fontcolor=white:x=(w-text_w)/2:y=60,drawtext=text='Backend\\: Rust + Axum + libpcap':fontsize=36:fontcolor=#58a6ff:x=(w-text_w)/2:y=280,drawtext=text='Frontend\\: D3.js + Chart.js + SSE':fontsize=36:fontcolor=#f0883e:x=(w-text_w)/2:y=380,drawtext=text='Protocols\\: Ethernet IPv4 TCP UDP ARP LLDP VLAN PTP':fontsize=26:fontcolor=#7ee787:x=(w-text_w)/2:y=520" -frames:v 1 f01.png 2>/dev/null''')
-
-# Screenshot frames
+text_frames = [
+    ("f00.png", [("TSN-Map", 80, "white", 570), ("Network Topology Visualization", 32, "#888888", 650), ("KETI", 24, "#666666", 1020)], (140, 330),
+     ["ffmpeg", "-y", "-f", "lavfi", "-i", "color=c=#0d1117:s=1920x1080:d=1", "-i", icon, "-filter_complex", "[1:v]scale=140:140[l];[0:v][l]overlay=(W-w)/2:(H-h)/2-140[b];[b]drawtext=text='TSN-Map':fontsize=80:fontcolor=white:x=(w-text_w)/2:y=(h/2)+30,drawtext=text='Network Topology Visualization':fontsize=32:fontcolor=#888888:x=(w-text_w)/2:y=(h/2)+110,drawtext=text='KETI':fontsize=24:fontcolor=#666666:x=(w-text_w)/2:y=h-60", "-frames:v", "1", "f00.png"]),
+    ("f01.png", [("Architecture", 56, "white", 60), ("Backend: Rust + Axum + libpcap", 36, "#58a6ff", 280), ("Frontend: D3.js + Chart.js + SSE", 36, "#f0883e", 380), ("Protocols: Ethernet IPv4 TCP UDP ARP LLDP VLAN PTP", 26, "#7ee787", 520)], None,
+     ["ffmpeg", "-y", "-f", "lavfi", "-i", "color=c=#0d1117:s=1920x1080:d=1", "-vf", "drawtext=text='Architecture':fontsize=56:fontcolor=white:x=(w-text_w)/2:y=60,drawtext=text='Backend\\: Rust + Axum + libpcap':fontsize=36:fontcolor=#58a6ff:x=(w-text_w)/2:y=280,drawtext=text='Frontend\\: D3.js + Chart.js + SSE':fontsize=36:fontcolor=#f0883e:x=(w-text_w)/2:y=380,drawtext=text='Protocols\\: Ethernet IPv4 TCP UDP ARP LLDP VLAN PTP':fontsize=26:fontcolor=#7ee787:x=(w-text_w)/2:y=520", "-frames:v", "1", "f01.png"]),
+    ("f10.png", [("TSN-Map", 60, "white", 570), ("Open Source by KETI", 26, "#888888", 640)], (100, 390),
+     ["ffmpeg", "-y", "-f", "lavfi", "-i", "color=c=#0d1117:s=1920x1080:d=1", "-i", icon, "-filter_complex", "[1:v]scale=100:100[l];[0:v][l]overlay=(W-w)/2:(H-h)/2-100[b];[b]drawtext=text='TSN-Map':fontsize=60:fontcolor=white:x=(w-text_w)/2:y=(h/2)+30,drawtext=text='Open Source by KETI':fontsize=26:fontcolor=#888888:x=(w-text_w)/2:y=(h/2)+100", "-frames:v", "1", "f10.png"]),
+]
 titles = ["", "Interface Selection", "Network Topology", "Packet Filtering", "Statistics", "Host Discovery", "Packet Details", "Packet Generator", "Large Scale"]
-for i in range(1, 9):
-    run(f'''ffmpeg -y -i s0{i}.png -vf "scale=1920:1080:force_original_aspect_ratio=decrease,pad=1920:1080:(ow-iw)/2:(oh-ih)/2:#0d1117,drawbox=y=0:w=iw:h=70:color=#0d1117@0.9:t=fill,drawtext=text='{titles[i]}':fontsize=32:fontcolor=white:x=30:y=18" -frames:v 1 f0{i+1}.png 2>/dev/null''')
-
-# Closing frame
-run(f'''ffmpeg -y -f lavfi -i color=c=#0d1117:s=1920x1080:d=1 -i "{icon}" -filter_complex "[1:v]scale=100:100[l];[0:v][l]overlay=(W-w)/2:(H-h)/2-100[b];[b]drawtext=text='TSN-Map':fontsize=60:fontcolor=white:x=(w-text_w)/2:y=(h/2)+30,drawtext=text='Open Source by KETI':fontsize=26:fontcolor=#888888:x=(w-text_w)/2:y=(h/2)+100" -frames:v 1 f10.png 2>/dev/null''')
+render_frames(icon, text_frames, [(f"s0{i}.png", f"f0{i+1}.png", titles[i]) for i in range(1, 9)], "/home/kim/tsn-map/pic/cache")
 print("  Frames done")
 
-# Create video segments
-print("\n[5/6] Creating video segments...")
-for i in range(11):
-    idx = f"{i:02d}"
-    run(f'ffmpeg -y -loop 1 -i f{idx}.png -i a{idx}.mp3 -c:v libx264 -tune stillimage -c:a aac -shortest -pix_fmt yuv420p v{idx}.mp4 2>/dev/null')
-    print(f"  Segment {i}/10")
-
-# Concat
-print("\n[6/6] Combining video...")
-with open("concat.txt", "w") as f:
-    for i in range(11):
-        f.write(f"file 'v{i:02d}.mp4'\n")
-
-run('ffmpeg -y -f concat -safe 0 -i concat.txt -c:v libx264 -crf 20 -c:a aac /home/kim/tsn-map/tsn-map-demo-full.mp4 2>/dev/null')
+# Create video
+print("\n[5/6] Creating video in one pass...")
+output = "/home/kim/tsn-map/tsn-map-demo-full.mp4"
+segments = [(f"f{i:02d}.png", f"a{i:02d}.mp3", f"v{i:02d}.mp4") for i in range(11)]
+# Two frames a second with a keyframe every second
+encoder, options = pick_encoder(gop=2)
+print(f"  Encoder: {encoder}")
+if not encode_one_pass(segments, output, options):
+    print("  One-pass encode failed, falling back to segments")
+    print("\n[6/6] Combining video...")
+    encode_segments(segments, output)
 
 # Done
 print("\n=== Complete! ===")
-run('ls -lh /home/kim/tsn-map/tsn-map-demo-full.mp4')
+if os.path.exists(output):
+    print(f"{output}  {os.stat(output).st_size / 1024 / 1024:.1f} MiB")
+else:
+    print(f"Error: {output} was not created")
 
 # Cleanup
 os.chdir("/home/kim/tsn-map")
-run('rm -rf /home/kim/tsn-map/pic/video_work')
+remove_in_background(work)
 print("Done!")